@@ -1,10 +1,34 @@
+import argparse
+import asyncio
+import os
+import random
 import requests
-from bs4 import BeautifulSoup
+import aiohttp
 import sqlite3
+import sys
+from nirf_parser import get_parser, PARSERS
 
-def create_db():
+# Stage timers shared with the processing scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data Processing'))
+from instrumentation import count, span
+
+# NIRF ranking categories and years to scrape
+CATEGORIES = ['Overall', 'University', 'College', 'Research', 'Engineering', 'Management',
+              'Pharmacy', 'Medical', 'Dental', 'Law', 'Architecture', 'Agriculture', 'Innovation']
+YEARS = [2020, 2021, 2022, 2023, 2024]
+
+BASE_URL = "https://www.nirfindia.org"
+
+# Responses worth retrying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def ranking_url(base_url, year, category):
+    """Build the ranking page URL for a year and category."""
+    return f"{base_url}/Rankings/{year}/{category}Ranking.html"
+
+def create_db(db_name='nirf_rankings.db'):
     """Create a SQLite database and table if it doesn't exist"""
-    conn = sqlite3.connect('nirf_rankings.db')
+    conn = sqlite3.connect(db_name)
     cursor = conn.cursor()
 
     # Create table to store scraped data
@@ -15,77 +39,193 @@ def create_db():
         institution_name TEXT,
         city TEXT,
         state TEXT,
-        score TEXT
+        score TEXT,
+        year INTEGER,
+        category TEXT
+    )
+    ''')
+
+    # Add the year/category columns to databases created before they existed
+    columns = {row[1] for row in cursor.execute('PRAGMA table_info(institutions)')}
+    if 'year' not in columns:
+        cursor.execute('ALTER TABLE institutions ADD COLUMN year INTEGER')
+    if 'category' not in columns:
+        cursor.execute('ALTER TABLE institutions ADD COLUMN category TEXT')
+    # Rows scraped before the columns existed are the Engineering 2024 rankings
+    cursor.execute("UPDATE institutions SET year = 2024, category = 'Engineering' WHERE year IS NULL")
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_institutions_category_year ON institutions (category, year)')
+
+    # Validators for conditional GETs
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS http_cache (
+        url TEXT PRIMARY KEY,
+        etag TEXT,
+        last_modified TEXT
     )
     ''')
 
     conn.commit()
     return conn, cursor
 
-def clear_table(cursor):
-    """Clear existing data in the institutions table"""
-    cursor.execute('DELETE FROM institutions')
+def clear_table(cursor, year=None, category=None):
+    """Clear existing data in the institutions table (optionally one year and category only)"""
+    if (year is None) != (category is None):
+        raise ValueError("clear_table needs both year and category, or neither")
+    if year is None:
+        cursor.execute('DELETE FROM institutions')
+        cursor.execute('DELETE FROM http_cache')
+    else:
+        cursor.execute('DELETE FROM institutions WHERE year = ? AND category = ?', (year, category))
 
-def insert_data(cursor, rank, name, city, state, score):
+def insert_data(cursor, rank, name, city, state, score, year=None, category=None):
     """Insert scraped data into the database"""
     cursor.execute('''
-    INSERT INTO institutions (rank, institution_name, city, state, score)
-    VALUES (?, ?, ?, ?, ?)
-    ''', (rank, name, city, state, score))
+    INSERT INTO institutions (rank, institution_name, city, state, score, year, category)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (rank, name, city, state, score, year, category))
 
-def scrape_and_store(url, cursor):
+def insert_rows(cursor, rows, year=None, category=None):
+    """Insert a page of parsed (rank, name, city, state, score) rows in one executemany"""
+    cursor.executemany('''
+    INSERT INTO institutions (rank, institution_name, city, state, score, year, category)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [(*row, year, category) for row in rows])
+
+def scrape_and_store(url, cursor, year=None, category=None, parse_rows=None):
     """Scrape data and store it in the database"""
-    # Send request and parse the page content with BeautifulSoup
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, 'html.parser')
-    
-    # Find the table by class name (or another appropriate attribute)
-    table = soup.find('table', {'id': 'tbl_overall'})
-    
-    # Extract all rows from the table
-    rows = table.find_all('tr')[1:]  # Skip the header row
-    
-    # Iterate through each row and extract the required data
-    for row in rows:
-        cols = row.find_all('td')
-        
-        if len(cols) < 10:
-            continue
-        
-        # Extracting the required details
-        rank = cols[-1].text.strip()  # Last column is the rank
-        name = cols[1].text.strip().split('More')[0].strip()  # Get name before "More"
-        percent = cols[9].text.strip()  # Percent is in the 10th column
-        city = cols[7].text.strip()  # City
-        state = cols[8].text.strip()  # State
-
-        # Insert the data into the database
-        insert_data(cursor, rank, name, city, state, percent)
+    # Send request and parse the raw page bytes with the fastest installed parser
+    parse_rows = parse_rows or get_parser()
+    with span('nirf_scrape_and_store') as s:
+        response = requests.get(url)
+        rows = parse_rows(response.content)
+        insert_rows(cursor, rows, year, category)
+        s.add_rows(len(rows))
 
-def display_data(cursor):
-    """Fetch and display the data from the database"""
-    cursor.execute('SELECT * FROM institutions ORDER BY CAST(rank AS INTEGER)')
-    rows = cursor.fetchall()
+async def fetch_page(session, semaphore, url, validators, retries=3, backoff=1.0):
+    """GET a page with conditional headers, retrying transient failures with exponential backoff.
+
+    Returns (status, body, etag, last_modified); body is None for 304 and 404 responses.
+    """
+    headers = {}
+    etag, last_modified = validators.get(url, (None, None))
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
 
-    for row in rows:
-        print(f"Rank: {row[1]}, Institution: {row[2]}, City: {row[3]}, State: {row[4]}, Score: {row[5]}")
+    for attempt in range(retries + 1):
+        try:
+            async with semaphore:
+                async with session.get(url, headers=headers) as response:
+                    if response.status in (304, 404):
+                        return response.status, None, etag, last_modified
+                    if response.status not in RETRY_STATUSES:
+                        response.raise_for_status()
+                        body = await response.read()
+                        return (response.status, body,
+                                response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                    error = aiohttp.ClientResponseError(
+                        response.request_info, response.history, status=response.status)
+        except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+            error = e
+
+        if attempt < retries:
+            # Back off outside the semaphore so other pages keep flowing
+            await asyncio.sleep(backoff * 2 ** attempt + random.uniform(0, backoff))
+    raise error
+
+def save_page(pages_dir, year, category, body):
+    """Keep the raw page under pages_dir/<year>/<Category>Ranking.html for parser benchmarks"""
+    path = os.path.join(pages_dir, str(year), f"{category}Ranking.html")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(body)
+
+async def scrape_all(conn, years, categories, base_url=BASE_URL, concurrency=8, retries=3,
+                     parse_rows=None, pages_dir=None):
+    """Fetch every year/category page concurrently and store each page in one transaction"""
+    parse_rows = parse_rows or get_parser()
+    cursor = conn.cursor()
+    validators = {url: (etag, last_modified) for url, etag, last_modified
+                  in cursor.execute('SELECT url, etag, last_modified FROM http_cache')}
+
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=60)
+    pages = [(year, category, ranking_url(base_url, year, category)) for year in years for category in categories]
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        async def fetch(year, category, url):
+            try:
+                return year, category, url, await fetch_page(session, semaphore, url, validators, retries)
+            except Exception as e:
+                return year, category, url, e
+
+        for task in asyncio.as_completed([fetch(*page) for page in pages]):
+            year, category, url, result = await task
+            if isinstance(result, Exception):
+                print(f"Failed {url}: {result}")
+                count('errors', 'nirf_fetch')
+                continue
+
+            status, body, etag, last_modified = result
+            if status == 304:
+                print(f"Unchanged {category} {year}")
+                count('unchanged', 'nirf_fetch')
+                continue
+            if status == 404:
+                print(f"No {category} ranking for {year}")
+                continue
+
+            if pages_dir:
+                save_page(pages_dir, year, category, body)
+            with span('nirf_store_page') as s:
+                rows = parse_rows(body)
+                with conn:
+                    # Replace this page's rows and remember its validators atomically
+                    clear_table(cursor, year, category)
+                    insert_rows(cursor, rows, year, category)
+                    cursor.execute('INSERT OR REPLACE INTO http_cache (url, etag, last_modified) VALUES (?, ?, ?)',
+                                   (url, etag, last_modified))
+                s.add_rows(len(rows))
+            print(f"Stored {len(rows)} {category} institutions for {year}")
+
+def display_data(cursor):
+    """Stream and display the data from the database"""
+    # Rows are printed as the cursor reads them instead of being fetched all at once
+    for row in cursor.execute('SELECT * FROM institutions ORDER BY category, year, CAST(rank AS INTEGER)'):
+        print(f"{row[7]} {row[6]} Rank: {row[1]}, Institution: {row[2]}, City: {row[3]}, State: {row[4]}, Score: {row[5]}")
 
 # Main execution
 if __name__ == "__main__":
-    nirf_url = "https://www.nirfindia.org/Rankings/2024/EngineeringRanking.html"
+    # Point --base-url at a local server (e.g. `python -m http.server` over saved
+    # Rankings/<year>/<Category>Ranking.html fixtures) to run offline
+    parser = argparse.ArgumentParser(description="Scrape NIRF rankings into nirf_rankings.db")
+    parser.add_argument('--years', type=int, nargs='+', default=YEARS)
+    parser.add_argument('--categories', nargs='+', default=CATEGORIES)
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--db', default='nirf_rankings.db')
+    parser.add_argument('--clear', action='store_true', help="drop stored rows and validators first")
+    parser.add_argument('--parser', default='auto', choices=['auto', *PARSERS])
+    parser.add_argument('--save-pages', metavar='DIR', help="also keep raw pages for nirf_parser.py benchmarks")
+    args = parser.parse_args()
 
     # Create database and table
-    conn, cursor = create_db()
+    conn, cursor = create_db(args.db)
 
     # Clear the existing data in the table
-    clear_table(cursor)
+    if args.clear:
+        clear_table(cursor)
+        conn.commit()
 
     # Scrape and store data
-    scrape_and_store(nirf_url, cursor)
+    asyncio.run(scrape_all(conn, args.years, args.categories, args.base_url, args.concurrency, args.retries,
+                           get_parser(args.parser), args.save_pages))
 
     # Display stored data
     display_data(cursor)
 
-    # Commit changes and close the database connection
-    conn.commit()
+    # Close the database connection
     conn.close()
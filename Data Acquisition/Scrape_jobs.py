@@ -1,30 +1,23 @@
+import argparse
+import os
+import queue
+import shutil
 import sqlite3
+import threading
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException
-from time import sleep, time
-from random import randint
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+from datetime import datetime, timezone
+from time import sleep, time, monotonic
+from random import uniform
 from fake_useragent import UserAgent
 import sys
 
-# Set the output encoding to UTF-8
-sys.stdout.reconfigure(encoding='utf-8')
-
-# Initialize ChromeOptions
-option = webdriver.ChromeOptions()
-
-# Enable incognito mode
-option.add_argument("--incognito")
-
-# Rotate User-Agent
-ua = UserAgent()
-option.add_argument(f"user-agent={ua.random}")
-
-# Suppress automation warning banner
-option.add_experimental_option("excludeSwitches", ["enable-automation"])
-option.add_experimental_option("useAutomationExtension", False)
+# Stage timers shared with the processing scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data Processing'))
+from analytics import JOBS_INDEXES
+from instrumentation import count, span
 
 # Pagination URL with placeholders
 paginaton_url = 'https://in.indeed.com/jobs?q={}&l={}&radius=35&sort=date&start={}'
@@ -33,77 +26,370 @@ paginaton_url = 'https://in.indeed.com/jobs?q={}&l={}&radius=35&sort=date&start=
 job_ = 'Engineer+Fresher'
 location = 'Bengaluru'
 
-# Initialize SQLite database
-conn = sqlite3.connect("jobs.db")
-cursor = conn.cursor()
-
-# Create jobs table
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS jobs (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    title TEXT,
-    company_location TEXT,
-    url TEXT,
-    job_id TEXT,
-    salary TEXT
-)
-""")
-
-# Initialize WebDriver
-driver = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=option)
-sleep(randint(2, 6))
-
-start = time()
-
-# Scraping loop for multiple pages
-max_iter_pgs = 10
-for i in range(max_iter_pgs):
-    current_url = paginaton_url.format(job_, location, i * 10)
-    print(f"Scraping page {i + 1}: {current_url}")
-    driver.get(current_url)
-    sleep(randint(10, 20))
+# Results per Indeed page
+PAGE_SIZE = 10
 
-    try:
-        job_page = driver.find_element(By.ID, "mosaic-jobResults")
-        jobs = job_page.find_elements(By.CLASS_NAME, "job_seen_beacon")
+def make_options(headless=True):
+    """Chrome options with a freshly rotated User-Agent."""
+    # Initialize ChromeOptions
+    option = webdriver.ChromeOptions()
 
-        for jj in jobs:
-            try:
-                job_title = jj.find_element(By.CLASS_NAME, "jobTitle").text
-                job_url = jj.find_element(By.CLASS_NAME, "jobTitle").find_element(By.CSS_SELECTOR, "a").get_attribute("href")
-                job_id = jj.find_element(By.CLASS_NAME, "jobTitle").find_element(By.CSS_SELECTOR, "a").get_attribute("id")
-                company_location = jj.find_element(By.CLASS_NAME, "company_location").text
+    # Enable incognito (and headless) mode
+    option.add_argument("--incognito")
+    if headless:
+        option.add_argument("--headless=new")
+
+    # Rotate User-Agent
+    option.add_argument(f"user-agent={UserAgent().random}")
+
+    # Suppress automation warning banner
+    option.add_experimental_option("excludeSwitches", ["enable-automation"])
+    option.add_experimental_option("useAutomationExtension", False)
+    return option
+
+def make_driver(headless=True, driver_path=None):
+    """Start Chrome with a local chromedriver (driver_path, $CHROMEDRIVER or PATH).
+
+    Only when none is installed is one downloaded with webdriver-manager, which needs network access.
+    """
+    driver_path = driver_path or os.environ.get('CHROMEDRIVER') or shutil.which('chromedriver')
+    if driver_path is None:
+        from webdriver_manager.chrome import ChromeDriverManager
+        driver_path = ChromeDriverManager().install()
+    return webdriver.Chrome(service=ChromeService(driver_path), options=make_options(headless))
+
+def create_db(db_name="jobs.db"):
+    """Create the jobs and task queue tables, deduplicating jobs on job_id."""
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+
+    # Create jobs table
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT,
+        company_location TEXT,
+        url TEXT,
+        job_id TEXT,
+        salary TEXT,
+        first_seen TEXT,
+        last_seen TEXT
+    )
+    """)
+
+    # Add the first_seen/last_seen columns to databases created before they existed
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(jobs)")}
+    for column in ("first_seen", "last_seen"):
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE jobs ADD COLUMN {column} TEXT")
+
+    # Drop duplicates left by earlier runs so the UNIQUE index can be built (rows without a job_id
+    # are distinct jobs, and the index allows any number of NULLs)
+    cursor.execute("""
+    DELETE FROM jobs WHERE job_id IS NOT NULL
+    AND id NOT IN (SELECT MIN(id) FROM jobs WHERE job_id IS NOT NULL GROUP BY job_id)
+    """)
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_job_id ON jobs (job_id)")
+    # Location and freshness lookups used by analytics.page_jobs
+    for name, indexed in JOBS_INDEXES.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON jobs ({indexed})")
 
-                # Handle salary information
+    # Persistent queue of pages to scrape, so interrupted runs resume
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS scrape_tasks (
+        query TEXT,
+        location TEXT,
+        page INTEGER,
+        status TEXT DEFAULT 'pending',  -- 'pending', 'done' or 'failed'
+        attempts INTEGER DEFAULT 0,
+        PRIMARY KEY (query, location, page)
+    )
+    """)
+
+    # Newest job seen per query, so incremental runs stop once they reach it
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS query_state (
+        query TEXT,
+        location TEXT,
+        high_water_job_id TEXT,
+        last_run TEXT,
+        PRIMARY KEY (query, location)
+    )
+    """)
+
+    conn.commit()
+    return conn, cursor
+
+def enqueue_tasks(conn, query, location, pages):
+    """Queue pages for a query; start a new run only once the previous one has finished."""
+    cursor = conn.cursor()
+    cursor.executemany("INSERT OR IGNORE INTO scrape_tasks (query, location, page) VALUES (?, ?, ?)",
+                       [(query, location, page) for page in range(pages)])
+
+    unfinished = cursor.execute("""
+    SELECT COUNT(*) FROM scrape_tasks WHERE query = ? AND location = ? AND page < ? AND status != 'done'
+    """, (query, location, pages)).fetchone()[0]
+    if unfinished == 0:
+        cursor.execute("UPDATE scrape_tasks SET status = 'pending', attempts = 0 WHERE query = ? AND location = ?",
+                       (query, location))
+    conn.commit()
+
+    return cursor.execute("""
+    SELECT query, location, page FROM scrape_tasks
+    WHERE query = ? AND location = ? AND page < ? AND status != 'done' ORDER BY page
+    """, (query, location, pages)).fetchall()
+
+class RateLimiter:
+    """Space one worker's page loads by a random interval between min_delay and max_delay seconds."""
+
+    def __init__(self, min_delay=10, max_delay=20):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._next = 0.0
+
+    def wait(self):
+        """Sleep until this worker may load its next page."""
+        delay = self._next - monotonic()
+        if delay > 0:
+            sleep(delay)
+        self._next = monotonic() + uniform(self.min_delay, self.max_delay)
+
+def scrape_page(driver, url):
+    """Load a results page and return its (title, company_location, url, job_id, salary) rows."""
+    driver.get(url)
+    rows = []
+
+    job_page = driver.find_element(By.ID, "mosaic-jobResults")
+    jobs = job_page.find_elements(By.CLASS_NAME, "job_seen_beacon")
+
+    for jj in jobs:
+        try:
+            job_title = jj.find_element(By.CLASS_NAME, "jobTitle").text
+            job_url = jj.find_element(By.CLASS_NAME, "jobTitle").find_element(By.CSS_SELECTOR, "a").get_attribute("href")
+            job_id = jj.find_element(By.CLASS_NAME, "jobTitle").find_element(By.CSS_SELECTOR, "a").get_attribute("id")
+            company_location = jj.find_element(By.CLASS_NAME, "company_location").text
+
+            # Handle salary information
+            try:
+                salary = jj.find_element(By.CLASS_NAME, "salary-snippet-container").text
+            except NoSuchElementException:
                 try:
-                    salary = jj.find_element(By.CLASS_NAME, "salary-snippet-container").text
+                    salary = jj.find_element(By.CLASS_NAME, "estimated-salary").text
                 except NoSuchElementException:
-                    try:
-                        salary = jj.find_element(By.CLASS_NAME, "estimated-salary").text
-                    except NoSuchElementException:
-                        salary = None
-
-                # Insert into database
-                cursor.execute("""
-                INSERT INTO jobs (title, company_location, url, job_id, salary)
-                VALUES (?, ?, ?, ?, ?)
-                """, (job_title, company_location, job_url, job_id, salary))
-                conn.commit()
+                    salary = None
 
+            rows.append((job_title, company_location, job_url, job_id, salary))
+
+        except NoSuchElementException:
+            pass
+
+    return rows
+
+def worker(tasks, results, url_template, driver_factory, min_delay, max_delay):
+    """Drive one browser from driver_factory() through queued pages, reporting rows back to the writer."""
+    try:
+        driver = driver_factory()
+    except WebDriverException as e:
+        print(f"Could not start the browser: {e}")
+        return
+    limiter = RateLimiter(min_delay, max_delay)
+
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+
+            query, loc, page = task
+            url = url_template.format(query, loc, page * PAGE_SIZE)
+            limiter.wait()
+            print(f"Scraping page {page + 1}: {url}")
+            try:
+                with span('jobs_page') as s:
+                    rows = scrape_page(driver, url)
+                    s.add_rows(len(rows))
+                results.put((task, rows, None))
             except NoSuchElementException:
-                pass
+                print(f"No job results found on page {page + 1}.")
+                count('empty_pages', 'jobs_page')
+                results.put((task, [], None))
+            except WebDriverException as e:
+                results.put((task, None, e))
+    finally:
+        driver.quit()
+
+def now():
+    """Current UTC time as an ISO-8601 string."""
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+def write_batch(conn, done, failed, rows):
+    """Upsert scraped rows and update task status in one transaction."""
+    seen = now()
+    with conn:
+        # New job_ids are inserted; known ones get their title/salary refreshed and last_seen bumped
+        conn.executemany("""
+        INSERT INTO jobs (title, company_location, url, job_id, salary, first_seen, last_seen)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (job_id) DO UPDATE SET
+            title = excluded.title,
+            salary = excluded.salary,
+            last_seen = excluded.last_seen
+        """, [(*row, seen, seen) for row in rows])
+        conn.executemany("UPDATE scrape_tasks SET status = 'done' WHERE query = ? AND location = ? AND page = ?", done)
+        conn.executemany("""
+        UPDATE scrape_tasks SET status = 'failed', attempts = attempts + 1
+        WHERE query = ? AND location = ? AND page = ?
+        """, failed)
+
+def get_high_water(conn, query, location):
+    """Newest job_id stored by the last run of this query, if any."""
+    row = conn.execute("SELECT high_water_job_id FROM query_state WHERE query = ? AND location = ?",
+                       (query, location)).fetchone()
+    return row[0] if row else None
+
+def set_high_water(conn, query, location, job_id):
+    """Record the newest job_id seen for this query."""
+    with conn:
+        conn.execute("""
+        INSERT INTO query_state (query, location, high_water_job_id, last_run) VALUES (?, ?, ?, ?)
+        ON CONFLICT (query, location) DO UPDATE SET
+            high_water_job_id = excluded.high_water_job_id,
+            last_run = excluded.last_run
+        """, (query, location, job_id, now()))
+
+def known_job_ids(conn, job_ids):
+    """The subset of job_ids already stored in the jobs table."""
+    known = set()
+    job_ids = list(job_ids)
+    for i in range(0, len(job_ids), 500):
+        chunk = job_ids[i:i + 500]
+        placeholders = ','.join('?' * len(chunk))
+        known.update(row[0] for row in conn.execute(
+            f"SELECT job_id FROM jobs WHERE job_id IN ({placeholders})", chunk))
+    return known
+
+def run(conn, tasks, url_template=paginaton_url, workers=4, headless=True,
+        min_delay=10, max_delay=20, commit_every=5, incremental=False, max_pages=10, driver_factory=None):
+    """Scrape tasks with a pool of browser workers; the calling thread does all database writes.
+
+    driver_factory() starts each worker's browser (default: make_driver(headless)), e.g. to use a
+    specific chromedriver or to point tests at fixture pages without network access.
+    In incremental mode each query is paginated one page at a time (results are sorted by date)
+    and stops at the first page with no new job_ids or that reaches the query's high-water mark.
+    """
+    task_queue = queue.Queue()
+    for task in tasks:
+        task_queue.put(task)
+    results = queue.Queue()
+    outstanding = len(tasks)
+    driver_factory = driver_factory or (lambda: make_driver(headless))
+
+    threads = [threading.Thread(target=worker, daemon=True,
+                                args=(task_queue, results, url_template, driver_factory, min_delay, max_delay))
+               for _ in range(min(workers, len(tasks)))]
+    for thread in threads:
+        thread.start()
+
+    high_water, new_high_water = {}, {}
+    if incremental:
+        high_water = {(query, loc): get_high_water(conn, query, loc) for query, loc, _ in tasks}
+    buffered_ids = set()
+
+    done, failed, rows = [], [], []
+    while outstanding:
+        try:
+            task, page_rows, error = results.get(timeout=1)
+        except queue.Empty:
+            # Every worker died (e.g. Chrome failed to start): leave the rest queued for the next run
+            if not any(thread.is_alive() for thread in threads) and results.empty():
+                break
+            continue
+        outstanding -= 1
+
+        if error is not None:
+            print(f"Page {task[2] + 1} failed: {error}")
+            failed.append(task)
+        else:
+            done.append(task)
+            rows.extend(page_rows)
+
+            if incremental:
+                query, loc, page = task
+                page_ids = {row[3] for row in page_rows}
+                new_ids = page_ids - buffered_ids - known_job_ids(conn, page_ids)
+                buffered_ids |= page_ids
+
+                if page == 0 and page_rows:
+                    # Results are newest first, so the top job becomes the next run's high-water mark
+                    new_high_water[(query, loc)] = page_rows[0][3]
+
+                reached_mark = high_water.get((query, loc)) in page_ids
+                if new_ids and not reached_mark and page + 1 < max_pages:
+                    next_task = (query, loc, page + 1)
+                    with conn:
+                        conn.execute("INSERT OR REPLACE INTO scrape_tasks (query, location, page) VALUES (?, ?, ?)",
+                                     next_task)
+                    task_queue.put(next_task)
+                    outstanding += 1
+                else:
+                    print(f"Caught up on {query} in {loc} after page {page + 1}")
+
+        # Batch commits across several pages
+        if len(done) + len(failed) >= commit_every:
+            write_batch(conn, done, failed, rows)
+            done, failed, rows = [], [], []
+            buffered_ids.clear()
+
+    write_batch(conn, done, failed, rows)
+    for (query, loc), job_id in new_high_water.items():
+        set_high_water(conn, query, loc, job_id)
+
+    # Let idle workers shut their browsers down
+    for _ in threads:
+        task_queue.put(None)
+    for thread in threads:
+        thread.join()
+
+# Main execution
+if __name__ == "__main__":
+    # Set the output encoding to UTF-8
+    sys.stdout.reconfigure(encoding='utf-8')
+
+    # Point --url-template at a local server of saved result pages to run offline
+    parser = argparse.ArgumentParser(description="Scrape Indeed job listings into jobs.db")
+    parser.add_argument('--query', default=job_)
+    parser.add_argument('--location', default=location)
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--min-delay', type=float, default=10)
+    parser.add_argument('--max-delay', type=float, default=20)
+    parser.add_argument('--url-template', default=paginaton_url)
+    parser.add_argument('--show-browser', action='store_true')
+    parser.add_argument('--driver-path', help="local chromedriver (default: $CHROMEDRIVER, then PATH, then download)")
+    parser.add_argument('--db', default='jobs.db')
+    parser.add_argument('--incremental', action='store_true',
+                        help="only fetch pages until already-known jobs are reached")
+    args = parser.parse_args()
 
-    except NoSuchElementException:
-        print(f"No job results found on page {i + 1}.")
+    # Initialize SQLite database
+    conn, cursor = create_db(args.db)
+    if args.incremental:
+        # Start from the first page; later pages are queued only while they keep yielding new jobs
+        tasks = enqueue_tasks(conn, args.query, args.location, 1)
+    else:
+        tasks = enqueue_tasks(conn, args.query, args.location, args.pages)
 
-driver.quit()
-end = time()
+    start = time()
+    run(conn, tasks, args.url_template, args.workers, not args.show_browser, args.min_delay, args.max_delay,
+        incremental=args.incremental, max_pages=args.pages,
+        driver_factory=lambda: make_driver(not args.show_browser, args.driver_path))
+    end = time()
 
-print(f"{end - start} seconds to complete query!")
+    print(f"{end - start} seconds to complete query!")
 
-# Display stored jobs
-print("Stored jobs in database:")
-for row in cursor.execute("SELECT * FROM jobs"):
-    print(row)
+    # Display stored jobs
+    print("Stored jobs in database:")
+    for row in cursor.execute("SELECT * FROM jobs"):
+        print(row)
 
-conn.close()
+    conn.close()
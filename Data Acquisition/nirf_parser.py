@@ -0,0 +1,138 @@
+import argparse
+import glob
+import re
+from time import perf_counter
+
+# Every backend is optional, so the others work (and can be benchmarked) without BeautifulSoup
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+# The name cell also holds the text of its "More Details" popup
+MORE_DETAILS = re.compile(r'\s*More(?=\s*(Details\b|\||$)).*$', re.S)
+
+def _row_values(cells):
+    """Pick (rank, name, city, state, score) out of a row's cell texts."""
+    rank = cells[-1].strip()  # Last column is the rank
+    name = MORE_DETAILS.sub('', cells[1].strip()).strip()  # Drop the trailing "More Details" popup text
+    percent = cells[9].strip()  # Percent is in the 10th column
+    city = cells[7].strip()  # City
+    state = cells[8].strip()  # State
+    return (rank, name, city, state, percent)
+
+def parse_bs4(html):
+    """Parse the #tbl_overall ranking table with BeautifulSoup's pure-Python html.parser."""
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find('table', {'id': 'tbl_overall'})
+    if table is None:
+        return []
+
+    parsed = []
+    for row in table.find_all('tr')[1:]:  # Skip the header row
+        cells = [col.text for col in row.find_all('td')]
+        if len(cells) >= 10:
+            parsed.append(_row_values(cells))
+    return parsed
+
+def parse_lxml(html):
+    """Parse the #tbl_overall ranking table with lxml (XPath over libxml2)."""
+    tree = lxml.html.fromstring(html)
+    tables = tree.xpath('//table[@id="tbl_overall"]')
+    if not tables:
+        return []
+
+    parsed = []
+    for row in tables[0].xpath('.//tr')[1:]:  # Skip the header row
+        cells = [col.text_content() for col in row.xpath('.//td')]
+        if len(cells) >= 10:
+            parsed.append(_row_values(cells))
+    return parsed
+
+def parse_selectolax(html):
+    """Parse the #tbl_overall ranking table with selectolax (CSS selectors over the lexbor engine)."""
+    table = LexborHTMLParser(html).css_first('#tbl_overall')
+    if table is None:
+        return []
+
+    parsed = []
+    for row in table.css('tr')[1:]:  # Skip the header row
+        cells = [col.text() for col in row.css('td')]
+        if len(cells) >= 10:
+            parsed.append(_row_values(cells))
+    return parsed
+
+PARSERS = {
+    'selectolax': (parse_selectolax, lambda: LexborHTMLParser is not None),
+    'lxml': (parse_lxml, lambda: lxml is not None),
+    'bs4': (parse_bs4, lambda: BeautifulSoup is not None),
+}
+
+def available_parsers():
+    """Names of the parser backends installed here, fastest first."""
+    return [name for name, (_, available) in PARSERS.items() if available()]
+
+def get_parser(name='auto'):
+    """Return the named parser, or the fastest installed one; falls back to BeautifulSoup."""
+    if name == 'auto':
+        installed = available_parsers()
+        if not installed:
+            raise ImportError("no HTML parser installed: install selectolax, lxml or beautifulsoup4")
+        name = installed[0]
+    if name not in PARSERS:
+        raise ValueError(f"unknown parser: {name}")
+
+    parse, available = PARSERS[name]
+    if not available():
+        if BeautifulSoup is None:
+            raise ImportError(f"{name} is not installed")
+        print(f"{name} is not installed, falling back to bs4")
+        return parse_bs4
+    return parse
+
+def benchmark(paths, backends=None, repeat=3):
+    """Parse saved pages with each backend and return {backend: rows per second}."""
+    pages = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            pages.append(f.read())
+
+    # Every backend must agree with the reference one (bs4 when it is installed)
+    backends = backends or available_parsers()
+    reference = 'bs4' if BeautifulSoup is not None else backends[0]
+    expected = [get_parser(reference)(page) for page in pages]
+    results = {}
+    for name in backends:
+        parse = get_parser(name)
+        best = None
+        for _ in range(repeat):
+            start = perf_counter()
+            rows = [parse(page) for page in pages]
+            elapsed = perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        if rows != expected:
+            raise AssertionError(f"{name} rows differ from {reference}")
+        results[name] = sum(len(r) for r in rows) / best
+    return results
+
+# Main execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark NIRF parser backends over saved pages.")
+    parser.add_argument('pages', nargs='+', help="saved ranking pages (globs allowed)")
+    parser.add_argument('--backends', nargs='+', choices=list(PARSERS))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    paths = [path for pattern in args.pages for path in sorted(glob.glob(pattern))]
+    for name, rate in benchmark(paths, args.backends, args.repeat).items():
+        print(f"{name:>10}: {rate:,.0f} rows/s")
@@ -1,5 +1,30 @@
+import argparse
+import os
 import sqlite3
 import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import numpy as np
+
+# Shared scoring module lives with the processing scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data Processing'))
+from scoring import score, score_matrix
+from Mapping import fetch_institutions
+
+DEPARTMENTS = ["Computer Science", "Mechanical", "Electrical", "Civil", "Electronics"]
+OUTCOMES = np.array(['Selected', 'Rejected', 'No Offer'])
+
+# Outcome weights (Selected, Rejected, No Offer) for high, low and middle weighted scores
+OUTCOME_WEIGHTS = {
+    'high': [85, 5, 10],
+    'low': [40, 50, 10],
+    'middle': [60, 10, 30],
+}
+
+# Bulk students are drawn in blocks of this many, each from its own child of SeedSequence(seed), so a
+# student's values depend only on the seed and its number, not on chunk size or sharding
+BLOCK_SIZE = 10_000
 
 class StudentDatabase:
     def __init__(self, db_name="students_college.db"):
@@ -25,10 +50,20 @@ class StudentDatabase:
             field TEXT     -- New column for IT or Non-IT categorization
         );
         """)
+        # Ranked institution choices; keyed by institution name, which survives NIRF re-scrapes
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS student_preferences (
+            student_id INTEGER,
+            institution_name TEXT,
+            preference INTEGER,  -- 1 is the student's first choice
+            PRIMARY KEY (student_id, preference)
+        );
+        """)
 
     def clear_table(self):
         """Clear the students table and reset the ID sequence."""
         self.cursor.execute("DELETE FROM students;")  # Clear table data
+        self.cursor.execute("DELETE FROM student_preferences;")
         self.cursor.execute("DELETE FROM sqlite_sequence WHERE name='students';")  # Reset AUTOINCREMENT
         self.connection.commit()
 
@@ -41,17 +76,9 @@ class StudentDatabase:
 
     def assign_outcome(self, cgpa, project_score, internships, extracurricular_score):
         """Probabilistic outcome assignment based on weighted score."""
-        # Weights for each factor
-        cgpa_weight = 0.4
-        project_weight = 0.3
-        internship_weight = 0.2
-        extracurricular_weight = 0.1
-
-        # Calculate weighted score
-        weighted_score = (cgpa * cgpa_weight) + (project_score * project_weight) + \
-                         (internships * internship_weight * 10) + (extracurricular_score * extracurricular_weight)
-        
-        
+        # Calculate weighted score (the 'outcome' profile in scoring.py)
+        weighted_score = score('outcome', cgpa, project_score, internships, extracurricular_score)
+
         if weighted_score > 70:
             # Very high chance of "Selected"
             return random.choices(['Selected', 'No Offer', 'Rejected'], weights=[85, 10, 5])[0]
@@ -87,15 +114,115 @@ class StudentDatabase:
             """, (name, enrollment_number, department, cgpa, project_score, internships, research_papers, extracurricular_score, outcome, field))
 
         self.connection.commit()
+        self.create_outcome_index()
+
+    def create_outcome_index(self):
+        """Index outcomes after loading, so count_outcomes' GROUP BY is a covering index scan."""
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_students_outcome ON students (outcome);")
+        self.connection.commit()
+
+    def tune_for_bulk_load(self):
+        """Trade durability for speed while bulk loading generated data."""
+        self.cursor.execute("PRAGMA journal_mode=WAL;")
+        self.cursor.execute("PRAGMA synchronous=OFF;")
+        self.cursor.execute("PRAGMA cache_size=-262144;")  # 256 MB
+        self.cursor.execute("PRAGMA temp_store=MEMORY;")
+        # Rebuilt once by create_outcome_index rather than maintained row by row
+        self.cursor.execute("DROP INDEX IF EXISTS idx_students_outcome;")
+
+    def draw_students(self, rng, n, names, start=0):
+        """Draw n students as NumPy columns and return them as insertable rows, numbered from start."""
+        index = np.arange(start, start + n)
+        departments = np.array(DEPARTMENTS)[rng.integers(0, len(DEPARTMENTS), n)]
+        cgpa = np.round(rng.uniform(6.0, 10.0, n), 2)
+        project_score = np.round(rng.uniform(50, 100, n), 1)
+        internships = rng.integers(0, 4, n)
+        research_papers = rng.integers(0, 3, n)
+        extracurricular_score = np.round(rng.uniform(50, 100, n), 1)
+
+        # Same weighted score and banded outcome weights as assign_outcome
+        weighted_score = score_matrix(np.column_stack([cgpa, project_score, internships, extracurricular_score]),
+                                      ['outcome'])[:, 0]
+        band = np.where(weighted_score > 70, 0, np.where(weighted_score < 40, 1, 2))
+        cumulative = np.cumsum([OUTCOME_WEIGHTS['high'], OUTCOME_WEIGHTS['low'], OUTCOME_WEIGHTS['middle']], axis=1)
+        draws = rng.uniform(0, 100, n)
+        outcome = OUTCOMES[(draws[:, None] >= cumulative[band]).sum(axis=1)]
+
+        field = np.where(np.isin(departments, ["Computer Science", "Electronics"]), "IT", "Non-IT")
+        name = np.array(names, dtype=object)[index % len(names)]
+        enrollment_number = np.char.add("EN", (index + 1000).astype(str))
+
+        return zip(name.tolist(), enrollment_number.tolist(), departments.tolist(), cgpa.tolist(),
+                   project_score.tolist(), internships.tolist(), research_papers.tolist(),
+                   extracurricular_score.tolist(), outcome.tolist(), field.tolist())
+
+    def iter_bulk_students(self, n, names, seed=None, start=0):
+        """Yield students start..start+n-1 as insertable rows, drawing whole BLOCK_SIZE blocks."""
+        entropy = np.random.SeedSequence(seed).entropy
+        end = start + n
+        for block in range(start // BLOCK_SIZE, -(-end // BLOCK_SIZE)):
+            block_start = block * BLOCK_SIZE
+            rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(block,)))
+            rows = list(self.draw_students(rng, BLOCK_SIZE, names, block_start))
+            yield from rows[max(start - block_start, 0):end - block_start]
+
+    def generate_students_bulk(self, n, names, seed=None, chunk_size=100_000, start=0):
+        """Generate and insert students start..start+n-1 with NumPy, one fixed-size chunk per transaction."""
+        self.tune_for_bulk_load()
+
+        students = self.iter_bulk_students(n, names, seed, start)
+        while True:
+            rows = list(islice(students, chunk_size))
+            if not rows:
+                break
+            with self.connection:
+                self.cursor.executemany("""
+                INSERT INTO students (name, enrollment_number, department, cgpa, project_score, internships, research_papers, extracurricular_score, outcome, field)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+                """, rows)
+        self.create_outcome_index()
+
+    def generate_preferences(self, institution_names, choices=5, seed=None, chunk_size=10_000):
+        """Give every student up to `choices` ranked institutions, favouring better-ranked ones.
 
-    def display_students(self):
-        """Fetch and display all student records."""
+        institution_names must be in NIRF rank order. Choices are drawn without replacement with
+        weight 1/rank (Gumbel top-k), a chunk of students per transaction.
+        """
+        if not institution_names:
+            raise ValueError("no institutions to draw preferences from; scrape the NIRF rankings first")
+        names = np.array(institution_names, dtype=object)
+        choices = min(choices, len(names))
+        log_weights = -np.log(np.arange(1, len(names) + 1))
+        ranks = np.arange(1, choices + 1)
+        rng = np.random.default_rng(seed)
+
+        self.cursor.execute("DELETE FROM student_preferences;")
+        students = self.connection.execute("SELECT id FROM students ORDER BY id;")
+        while True:
+            ids = np.array([row[0] for row in students.fetchmany(chunk_size)])
+            if not len(ids):
+                break
+            keys = log_weights + rng.gumbel(size=(len(ids), len(names)))
+            top = np.argpartition(-keys, choices - 1, axis=1)[:, :choices]
+            top = np.take_along_axis(top, np.argsort(-np.take_along_axis(keys, top, axis=1), axis=1), axis=1)
+            with self.connection:
+                self.cursor.executemany("""
+                INSERT INTO student_preferences (student_id, institution_name, preference) VALUES (?, ?, ?);
+                """, zip(np.repeat(ids, choices).tolist(), names[top].ravel().tolist(),
+                         np.tile(ranks, len(ids)).tolist()))
+        self.connection.commit()
+
+    def display_students(self, batch_size=10_000):
+        """Stream and display all student records, a batch at a time."""
         self.cursor.execute("SELECT * FROM students;")
-        rows = self.cursor.fetchall()
-        for row in rows:
-            print(f"ID: {row[0]}, Name: {row[1]}, Enrollment No: {row[2]}, Department: {row[3]}, "
-                  f"CGPA: {row[4]}, Project Score: {row[5]}, Internships: {row[6]}, "
-                  f"Research Papers: {row[7]}, Extracurricular Score: {row[8]}, Outcome: {row[9]}, Field: {row[10]}")
+        while True:
+            rows = self.cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                print(f"ID: {row[0]}, Name: {row[1]}, Enrollment No: {row[2]}, Department: {row[3]}, "
+                      f"CGPA: {row[4]}, Project Score: {row[5]}, Internships: {row[6]}, "
+                      f"Research Papers: {row[7]}, Extracurricular Score: {row[8]}, Outcome: {row[9]}, Field: {row[10]}")
             
     def count_outcomes(self):
         """Count the occurrences of each outcome ('Selected', 'Rejected', 'No Offer')."""
@@ -115,6 +242,59 @@ class StudentDatabase:
         """Close the database connection."""
         self.connection.close()
 
+def shard_ranges(n, workers):
+    """Split n students into contiguous (start, count) ranges, one per worker."""
+    base, extra = divmod(n, workers)
+    ranges, start = [], 0
+    for w in range(workers):
+        count = base + (1 if w < extra else 0)
+        ranges.append((start, count))
+        start += count
+    return ranges
+
+def shard_path(out_dir, shard, prefix="students_college"):
+    """File name of one shard database."""
+    return os.path.join(out_dir, f"{prefix}.shard{shard:03d}.db")
+
+def generate_shard(path, start, count, seed, names, chunk_size):
+    """Worker: generate one shard's range of students."""
+    db = StudentDatabase(path)
+    db.clear_table()
+    db.generate_students_bulk(count, names, seed, chunk_size=chunk_size, start=start)
+    db.close_connection()
+    return path
+
+def generate_sharded(n, names, workers, seed=0, out_dir=".", chunk_size=100_000):
+    """Generate n students across a process pool, one shard database per worker.
+
+    Each shard generates its own contiguous range of student numbers from the per-block streams, so
+    the merged output depends only on seed and n: workers and chunk_size change how the work is split,
+    not the data.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths = [shard_path(out_dir, w) for w in range(workers)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(generate_shard, path, start, count, seed, names, chunk_size)
+                   for w, (path, (start, count)) in enumerate(zip(paths, shard_ranges(n, workers)))]
+        return [future.result() for future in futures]
+
+def merge_shards(paths, db_name="students_college.db"):
+    """Combine shard databases into one students table, in shard order."""
+    db = StudentDatabase(db_name)
+    db.clear_table()
+    db.tune_for_bulk_load()
+
+    columns = ("name, enrollment_number, department, cgpa, project_score, internships, "
+               "research_papers, extracurricular_score, outcome, field")
+    for path in paths:
+        db.cursor.execute("ATTACH DATABASE ? AS shard;", (path,))
+        with db.connection:
+            db.cursor.execute(f"INSERT INTO students ({columns}) SELECT {columns} FROM shard.students ORDER BY id;")
+        db.cursor.execute("DETACH DATABASE shard;")
+    db.create_outcome_index()
+    return db
+
 
 # Usage
 if __name__ == "__main__":
@@ -168,25 +348,63 @@ if __name__ == "__main__":
     "VENKATESH S S", "Vinay DH"
 ]
 
-    # Extend the names to generate at least 600 records
-    extended_names = names * (600 // len(names) + 1)
-    final_names = extended_names[:600]
+    parser = argparse.ArgumentParser(description="Generate synthetic student records.")
+    parser.add_argument('--bulk', type=int, metavar='N', help="generate N records with the vectorized generator")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, default=1,
+                        help="with --bulk, generate in parallel into one shard database per worker")
+    parser.add_argument('--shards-dir', default='.')
+    parser.add_argument('--merge', action='store_true', help="combine the shards into students_college.db")
+    parser.add_argument('--preferences', type=int, metavar='K',
+                        help="also draw K ranked institution choices per student from nirf_rankings.db "
+                             "(used by Mapping.py --strategy stable)")
+    args = parser.parse_args()
+    if args.preferences and args.bulk and args.workers > 1 and not args.merge:
+        parser.error("--preferences needs a single database; add --merge")
 
-    # Initialize database
-    db = StudentDatabase()
+    if args.bulk and args.workers > 1:
+        paths = generate_sharded(args.bulk, names, args.workers, seed=args.seed or 0,
+                                 out_dir=args.shards_dir, chunk_size=args.chunk_size)
+        print(f"{args.bulk} student records generated into {len(paths)} shards")
+        if not args.merge:
+            # Mapping.py can read the shards directly
+            for path in paths:
+                print(path)
+            raise SystemExit
 
-    # Clear existing data to avoid duplicates
-    db.clear_table()
+        db = merge_shards(paths)
+        print("Shards merged into students_college.db")
+    else:
+        # Initialize database
+        db = StudentDatabase()
+
+        # Clear existing data to avoid duplicates
+        db.clear_table()
+
+        if args.bulk:
+            # Generate new student records in chunks; too many to display
+            db.generate_students_bulk(args.bulk, names, seed=args.seed, chunk_size=args.chunk_size)
+            print(f"{args.bulk} student records generated and stored successfully!")
+        else:
+            # Extend the names to generate at least 600 records
+            extended_names = names * (600 // len(names) + 1)
+            final_names = extended_names[:600]
+
+            # Generate new student records
+            db.generate_students(final_names)
+
+            print("Student data generated and stored successfully!\n")
+            print("Displaying all students:\n")
 
-    # Generate new student records
-    db.generate_students(final_names)
+            # Display the latest data
+            db.display_students()
 
-    print("Student data generated and stored successfully!\n")
-    print("Displaying all students:\n")
+    if args.preferences:
+        db.generate_preferences([institution[1] for institution in fetch_institutions()],
+                                choices=args.preferences, seed=args.seed)
+        print(f"{args.preferences} institution preferences drawn per student")
 
-    # Display the latest data
-    db.display_students()
-    
     outcome_counts = db.count_outcomes()
     print("\nOutcome counts:")
     for outcome, count in outcome_counts.items():
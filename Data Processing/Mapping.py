@@ -1,110 +1,257 @@
+import argparse
+import heapq
+import os
 import sqlite3
+import sys
+from itertools import islice
+from time import perf_counter
+import numpy as np
+from analytics import MAPPING_INDEXES, AggregateCounter, swap_aggregates
+from dataset import CATEGORY_CODES, pa, pq, require_pyarrow
+from instrumentation import instrument, timed
+from scoring import sql_expression
+from stable_matching import deferred_acceptance, preferences_to_csr
 
-def fetch_students():
-    """Fetch students from the database and calculate their total scores."""
-    conn = sqlite3.connect("students_college.db")
+# Total score used to rank students, evaluated inside SQLite
+TOTAL_SCORE_SQL = sql_expression('mapping')
+
+def ensure_score_index(conn):
+    """Index students on their total score so ranking them is an index scan, not a sort."""
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_students_total_score ON students (({TOTAL_SCORE_SQL}) DESC, id);")
+    conn.commit()
+
+def _iter_student_db(db_name, batch_size):
+    """Yield one database's students in descending total score order."""
+    conn = sqlite3.connect(db_name)
+    ensure_score_index(conn)
     cursor = conn.cursor()
 
-    # Fetch required student data including additional columns
-    cursor.execute("""
-    SELECT id, name, cgpa, project_score, internships, extracurricular_score, department, field, outcome
-    FROM students;
+    # Fetch required student data with the total score computed and sorted by SQLite
+    cursor.execute(f"""
+    SELECT id, name, cgpa, project_score, internships, extracurricular_score, department, field, outcome,
+           {TOTAL_SCORE_SQL} AS total_score
+    FROM students
+    ORDER BY {TOTAL_SCORE_SQL} DESC, id;
     """)
-    students = cursor.fetchall()
-    conn.close()
+    try:
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield from batch
+    finally:
+        conn.close()
 
-    # Calculate total scores
-    student_scores = []
-    for student in students:
-        total_score = (
-            student[2] * 4 +        # CGPA weight: 4
-            student[3] * 2 +        # Project Score weight: 2
-            student[4] * 1.5 +      # Internships weight: 1.5
-            student[5] * 1          # Extracurricular Score weight: 1
-        )
-        student_scores.append((
-            student[0],  # ID
-            student[1],  # Name
-            student[2],  # CGPA
-            student[3],  # Project Score
-            student[4],  # Internships
-            student[5],  # Extracurricular Score
-            student[6],  # Department
-            student[7],  # Field
-            student[8],  # Outcome
-            total_score  # Total Score
-        ))
-
-    # Sort by total score in descending order
-    return sorted(student_scores, key=lambda x: x[9], reverse=True)
-
-def fetch_institutions():
-    """Fetch institutions from the database, sorted by rank."""
+def iter_students(db_names="students_college.db", batch_size=10_000):
+    """Stream students from one database (or merged across shard databases) by descending total score.
+
+    Each yielded tuple is (id, name, cgpa, project_score, internships, extracurricular_score,
+    department, field, outcome, total_score).
+    """
+    if isinstance(db_names, str):
+        db_names = [db_names]
+    if len(db_names) == 1:
+        return _iter_student_db(db_names[0], batch_size)
+
+    # Shards are each sorted already; ties keep shard order, as a stable sort of the concatenation would
+    return heapq.merge(*(_iter_student_db(db_name, batch_size) for db_name in db_names), key=lambda s: -s[9])
+
+def count_students(db_names="students_college.db"):
+    """Count students across one or more databases."""
+    if isinstance(db_names, str):
+        db_names = [db_names]
+
+    total = 0
+    for db_name in db_names:
+        conn = sqlite3.connect(db_name)
+        total += conn.execute("SELECT COUNT(*) FROM students;").fetchone()[0]
+        conn.close()
+    return total
+
+@instrument('fetch_students', rows=len)
+def fetch_students(db_names="students_college.db"):
+    """Fetch students from the database (or a list of shard databases), sorted by total score."""
+    return list(iter_students(db_names))
+
+@instrument('fetch_institutions', rows=len)
+def fetch_institutions(category="Engineering", year=None):
+    """Fetch institutions of one NIRF category and year (latest by default), sorted by rank."""
     conn = sqlite3.connect("nirf_rankings.db")
     cursor = conn.cursor()
 
     # Fetch institution data
-    cursor.execute("SELECT id, institution_name, rank FROM institutions ORDER BY CAST(rank AS INTEGER);")
+    cursor.execute("""
+    SELECT id, institution_name, rank FROM institutions
+    WHERE category = ? AND year = COALESCE(?, (SELECT MAX(year) FROM institutions WHERE category = ?))
+    ORDER BY CAST(rank AS INTEGER);
+    """, (category, year, category))
     institutions = cursor.fetchall()
     conn.close()
     return institutions
 
+def _mapping_row(student, institution):
+    """Build a student_institution_mappings row from a student and an institution."""
+    return (
+        student[1],  # Student Name
+        student[2],  # CGPA
+        student[3],  # Project Score
+        student[4],  # Internships
+        student[5],  # Extracurricular Score
+        student[9],  # Total Score
+        student[6],  # Department
+        student[7],  # Field
+        student[8],  # Outcome
+        institution[1],  # Institution Name
+        institution[2]   # Institution Rank
+    )
+
+# Institution columns of a student left without a seat
+UNMATCHED = (None, None, None)
+
+def allocate_students(students, institutions, capacities=None, department_quotas=None, total=None):
+    """Stream students (best first) into institutions in rank order, filling each institution's quota.
+
+    capacities gives the seats per institution; by default the total students are split equally.
+    department_quotas caps the students of a department at each institution ({department: seats}).
+    With the default equal split, students left once every seat is taken are spread round-robin,
+    best institution first; with explicit capacities or quotas they are kept with no institution.
+    """
+    num_institutions = len(institutions)
+    if num_institutions == 0:
+        raise ValueError("no institutions to map students to; scrape the NIRF rankings first")
+    round_robin = capacities is None and not department_quotas
+    if capacities is None:
+        if total is None:
+            raise ValueError("total is required for equal capacities")
+        capacities = [total // num_institutions] * num_institutions
+    remaining = list(capacities)
+    department_quotas = department_quotas or {}
+
+    # Seats left per department at each institution, and the first institution that may still
+    # take each department; both only ever move forward
+    department_remaining = {}
+    next_open = {}
+    first_open = 0
+    overflow = 0
+
+    for student in students:
+        department = student[6]
+        while first_open < num_institutions and remaining[first_open] == 0:
+            first_open += 1
+
+        i = max(first_open, next_open.get(department, 0))
+        if department in department_quotas:
+            seats = department_remaining.setdefault(department, [department_quotas[department]] * num_institutions)
+            while i < num_institutions and (remaining[i] == 0 or seats[i] == 0):
+                i += 1
+            next_open[department] = i
+        else:
+            while i < num_institutions and remaining[i] == 0:
+                i += 1
+
+        if i < num_institutions:
+            remaining[i] -= 1
+            if department in department_quotas:
+                department_remaining[department][i] -= 1
+        elif round_robin:
+            # Handle remaining students if any
+            i = overflow % num_institutions
+            overflow += 1
+        else:
+            yield _mapping_row(student, UNMATCHED)
+            continue
+
+        yield _mapping_row(student, institutions[i])
+
+@instrument('map_students', rows=len)
 def map_students_to_institutions(students, institutions):
     """Map students to institutions based on cutoff scores."""
-    mappings = []
+    return list(allocate_students(students, institutions, total=len(students)))
+
+def fetch_preferences(students, institutions, db_name="students_college.db"):
+    """Read ranked institution preferences from a student_preferences table, as CSR arrays.
+
+    Preferences name institutions (see student.py --preferences), so they stay valid when the
+    rankings are re-scraped; choices outside this category and year are skipped. Returns None when
+    the database has no preferences, in which case every student ranks the institutions by NIRF rank.
+    """
+    conn = sqlite3.connect(db_name)
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'student_preferences';").fetchone()
+    if not exists:
+        conn.close()
+        return None
+
+    student_pos = {student[0]: i for i, student in enumerate(students)}
+    institution_pos = {institution[1]: i for i, institution in enumerate(institutions)}
+    triples = [
+        (student_pos[student_id], institution_pos[institution_name], preference)
+        for student_id, institution_name, preference in conn.execute(
+            "SELECT student_id, institution_name, preference FROM student_preferences;")
+        if student_id in student_pos and institution_name in institution_pos
+    ]
+    conn.close()
+
+    if not triples:
+        return None
+
+    student_index, institution_index, preference = (np.array(column) for column in zip(*triples))
+    return preferences_to_csr(student_index, institution_index, preference, len(students))
+
+@instrument('map_students_stable', rows=len)
+def map_students_stable(students, institutions, preferences=None, capacities=None):
+    """Map students to institutions by deferred acceptance over their ranked preferences.
+
+    students must be sorted by total score; institutions prefer higher-scoring students.
+    preferences is a (pref_ptr, pref_inst) CSR pair from fetch_preferences, or None for everyone
+    ranking institutions by NIRF rank. Unmatched students are kept with no institution.
+    """
     num_institutions = len(institutions)
-    students_per_institution = len(students) // num_institutions
-
-    for i, institution in enumerate(institutions):
-        start_idx = i * students_per_institution
-        end_idx = start_idx + students_per_institution
-
-        # Assign students within the range to the current institution
-        for student in students[start_idx:end_idx]:
-            mappings.append((
-                student[1],  # Student Name
-                student[2],  # CGPA
-                student[3],  # Project Score
-                student[4],  # Internships
-                student[5],  # Extracurricular Score
-                student[9],  # Total Score
-                student[6],  # Department
-                student[7],  # Field
-                student[8],  # Outcome
-                institution[1],  # Institution Name
-                institution[2]   # Institution Rank
-            ))
-
-    # Handle remaining students if any
-    remaining_students = students[num_institutions * students_per_institution:]
-    for i, student in enumerate(remaining_students):
-        institution = institutions[i % num_institutions]
-        mappings.append((
-            student[1],  # Student Name
-            student[2],  # CGPA
-            student[3],  # Project Score
-            student[4],  # Internships
-            student[5],  # Extracurricular Score
-            student[9],  # Total Score
-            student[6],  # Department
-            student[7],  # Field
-            student[8],  # Outcome
-            institution[1],  # Institution Name
-            institution[2]   # Institution Rank
-        ))
-
-    return mappings
-
-def save_mappings_to_db(mappings, db_name="mapped_data.db"):
-    """Save the mapped data into a new SQLite database."""
+    if num_institutions == 0:
+        raise ValueError("no institutions to map students to; scrape the NIRF rankings first")
+    if capacities is None:
+        # Equal split, rounded up so everyone can be placed
+        capacities = [-(-len(students) // num_institutions)] * num_institutions
+
+    pref_ptr, pref_inst = preferences if preferences is not None else (None, np.arange(num_institutions))
+    assignment = deferred_acceptance(pref_ptr, pref_inst, capacities, np.arange(len(students)))
+
+    return [_mapping_row(student, institutions[i] if i >= 0 else UNMATCHED)
+            for student, i in zip(students, assignment.tolist())]
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+@instrument('save_mappings', rows=lambda stats: stats['rows'])
+def save_mappings_to_db(mappings, db_name="mapped_data.db", chunk_size=50_000):
+    """Save the mapped data into a new SQLite database.
+
+    mappings may be any iterable (e.g. the allocate_students generator); it is written in chunks
+    to a staging table that replaces the live table in one transaction, so readers never see a
+    half-written table. Outcome counts for analytics.py are accumulated chunk by chunk and swapped
+    in with it. Returns rows written, rows per second and peak RSS.
+    """
+    start = perf_counter()
     conn = sqlite3.connect(db_name)
     cursor = conn.cursor()
-    
-    cursor.execute("DROP TABLE IF EXISTS student_institution_mappings;")
 
-    # Create the new table
+    # Bulk-load settings: WAL lets readers keep using the live table during the load
+    cursor.execute("PRAGMA journal_mode=WAL;")
+    cursor.execute("PRAGMA synchronous=OFF;")
+    cursor.execute("PRAGMA cache_size=-262144;")  # 256 MB
+    cursor.execute("PRAGMA temp_store=MEMORY;")
+
+    cursor.execute("DROP TABLE IF EXISTS student_institution_mappings_new;")
+
+    # Create the staging table
     cursor.execute("""
-    CREATE TABLE IF NOT EXISTS student_institution_mappings (
+    CREATE TABLE student_institution_mappings_new (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         student_name TEXT,
         cgpa REAL,
@@ -119,21 +266,45 @@ def save_mappings_to_db(mappings, db_name="mapped_data.db"):
         institution_rank INTEGER
     );
     """)
-    
-
+    conn.commit()
 
+    # Insert data one chunk per transaction, never materializing the whole mapping
+    aggregates = AggregateCounter()
+    rows = 0
+    mappings = iter(mappings)
+    while True:
+        chunk = list(islice(mappings, chunk_size))
+        if not chunk:
+            break
+        with conn:
+            cursor.executemany("""
+            INSERT INTO student_institution_mappings_new (
+                student_name, cgpa, project_score, internships, extracurricular_score,
+                total_score, department, field, outcome, institution_name, institution_rank
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+            """, chunk)
+        aggregates.update(chunk)
+        rows += len(chunk)
 
-    # Insert data into the table
-    cursor.executemany("""
-    INSERT INTO student_institution_mappings (
-        student_name, cgpa, project_score, internships, extracurricular_score, 
-        total_score, department, field, outcome, institution_name, institution_rank
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
-    """, mappings)
+    # Swap the staging table and its aggregates in and index it, atomically. sqlite3 opens no implicit
+    # transaction for DDL, so begin one explicitly; readers must never find the table missing
+    with conn:
+        cursor.execute("BEGIN IMMEDIATE;")
+        aggregates.write(cursor, suffix="_new")
+        cursor.execute("DROP TABLE IF EXISTS student_institution_mappings;")
+        cursor.execute("ALTER TABLE student_institution_mappings_new RENAME TO student_institution_mappings;")
+        swap_aggregates(cursor, suffix="_new")
+        for name, columns in MAPPING_INDEXES.items():
+            cursor.execute(f"CREATE INDEX {name} ON student_institution_mappings ({columns});")
 
-    # Commit and close the connection
-    conn.commit()
     conn.close()
+    seconds = perf_counter() - start
+    return {
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
 
 def display_mappings(mappings):
     """Display the student-to-institution mappings."""
@@ -146,17 +317,150 @@ def display_mappings(mappings):
             f"Outcome: {mapping[8]}, Institution: {mapping[9]}, Rank: {mapping[10]}"
         )
 
+def iter_mappings(db_name="mapped_data.db", batch_size=10_000):
+    """Stream stored mappings back in insertion order."""
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    cursor.execute("""
+    SELECT student_name, cgpa, project_score, internships, extracurricular_score,
+           total_score, department, field, outcome, institution_name, institution_rank
+    FROM student_institution_mappings ORDER BY id;
+    """)
+    try:
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield from batch
+    finally:
+        conn.close()
+
+def _arrow_batch(rows, schema):
+    """Build an Arrow record batch from mapping rows, with category columns dictionary-encoded."""
+    columns = dict(zip(schema.names, zip(*rows)))
+    arrays = []
+    for field in schema:
+        values = columns[field.name]
+        if field.name in CATEGORY_CODES:
+            # Fixed dictionaries, so the indices are already the model's integer codes
+            codes = CATEGORY_CODES[field.name]
+            arrays.append(pa.DictionaryArray.from_arrays(
+                pa.array([codes[v] for v in values], type=pa.int8()), pa.array(list(codes))))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+@instrument('export_dataset')
+def export_dataset(db_name="mapped_data.db", out_dir="mapped_data", file_format="parquet",
+                   rows_per_file=1_000_000, batch_size=100_000):
+    """Write student_institution_mappings as partitioned Parquet (or Arrow IPC) files.
+
+    Department, field and outcome are dictionary-encoded with the model's codes, so
+    dataset.load_feature_matrix can map them straight into the feature matrix.
+    """
+    require_pyarrow()
+    dictionary = pa.dictionary(pa.int8(), pa.string())
+    schema = pa.schema([
+        ('student_name', pa.string()),
+        ('cgpa', pa.float64()),
+        ('project_score', pa.float64()),
+        ('internships', pa.int64()),
+        ('extracurricular_score', pa.float64()),
+        ('total_score', pa.float64()),
+        ('department', dictionary),
+        ('field', dictionary),
+        ('outcome', dictionary),
+        ('institution_name', pa.string()),
+        ('institution_rank', pa.string()),
+    ])
+
+    os.makedirs(out_dir, exist_ok=True)
+    for old in os.listdir(out_dir):
+        if old.startswith('part-'):
+            os.remove(os.path.join(out_dir, old))
+
+    def open_writer(part):
+        path = os.path.join(out_dir, f"part-{part:05d}.{'arrow' if file_format == 'arrow' else 'parquet'}")
+        if file_format == 'arrow':
+            return pa.ipc.new_file(path, schema)
+        return pq.ParquetWriter(path, schema)
+
+    part, rows_in_part, writer = 0, 0, None
+    batch = []
+    rows = iter_mappings(db_name, batch_size)
+    while True:
+        for row in rows:
+            batch.append(row[:10] + (None if row[10] is None else str(row[10]),))
+            if len(batch) == min(batch_size, rows_per_file - rows_in_part):
+                break
+        if not batch:
+            break
+
+        if writer is None:
+            writer = open_writer(part)
+        record_batch = _arrow_batch(batch, schema)
+        if file_format == 'arrow':
+            writer.write_batch(record_batch)
+        else:
+            writer.write_table(pa.Table.from_batches([record_batch]))
+        rows_in_part += len(batch)
+        batch = []
+
+        # Start a new partition file once this one is full
+        if rows_in_part >= rows_per_file:
+            writer.close()
+            writer, part, rows_in_part = None, part + 1, 0
+
+    if writer is not None:
+        writer.close()
+
 # Main Execution
 if __name__ == "__main__":
-    # Fetch students and institutions
-    students = fetch_students()
+    parser = argparse.ArgumentParser(description="Map students to NIRF institutions.")
+    parser.add_argument('student_dbs', nargs='*', default=["students_college.db"],
+                        help="students_college.db, or the shards written by student.py --workers N")
+    parser.add_argument('--capacity', type=int, help="seats per institution (default: equal split)")
+    parser.add_argument('--department-quota', type=int, help="seats per department at each institution")
+    parser.add_argument('--strategy', choices=['rank', 'stable'], default='rank',
+                        help="rank: fill institutions in score order; stable: deferred acceptance on preferences")
+    parser.add_argument('--quiet', action='store_true', help="don't print every mapping")
+    parser.add_argument('--export', choices=['parquet', 'arrow'], help="also write the mapped dataset as columnar files")
+    parser.add_argument('--export-dir', default='mapped_data')
+    args = parser.parse_args()
+    if args.strategy == 'stable' and args.department_quota:
+        parser.error("--department-quota is not supported with --strategy stable")
+
+    # Fetch institutions; students are streamed in score order (timed as they are read)
     institutions = fetch_institutions()
+    students = timed('fetch_students', iter_students(args.student_dbs))
+
+    capacities = [args.capacity] * len(institutions) if args.capacity else None
+    department_quotas = None
+    if args.department_quota:
+        department_quotas = {d: args.department_quota for d in
+                             ["Computer Science", "Mechanical", "Electrical", "Civil", "Electronics"]}
 
     # Perform mapping
-    student_institution_mappings = map_students_to_institutions(students, institutions)
+    if args.strategy == 'stable':
+        students = list(students)
+        preferences = fetch_preferences(students, institutions, args.student_dbs[0]) \
+            if len(args.student_dbs) == 1 else None
+        student_institution_mappings = map_students_stable(students, institutions, preferences, capacities)
+    else:
+        student_institution_mappings = timed('map_students', allocate_students(
+            students, institutions, capacities, department_quotas, total=count_students(args.student_dbs)))
 
     # Save mappings to a new database
-    save_mappings_to_db(student_institution_mappings)
+    stats = save_mappings_to_db(student_institution_mappings)
+    peak = f"{stats['peak_rss_mb']:.1f} MB" if stats['peak_rss_mb'] is not None else "n/a"
+    print(f"Saved {stats['rows']} mappings in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_second']:,.0f} rows/s, peak RSS {peak})")
+
+    # Export the training dataset in columnar form
+    if args.export:
+        export_dataset(out_dir=args.export_dir, file_format=args.export)
+        print(f"Exported mapped dataset to {args.export_dir} ({args.export})")
 
     # Display mappings
-    display_mappings(student_institution_mappings)
+    if not args.quiet:
+        display_mappings(iter_mappings())
@@ -0,0 +1,171 @@
+import argparse
+import sqlite3
+from collections import Counter
+
+# Columns of a mapping row, in the order Mapping.py writes them
+MAPPING_COLUMNS = ['student_name', 'cgpa', 'project_score', 'internships', 'extracurricular_score',
+                   'total_score', 'department', 'field', 'outcome', 'institution_name', 'institution_rank']
+
+# Covering indexes on student_institution_mappings: filters on the leading columns and the
+# grouped/returned columns are all answered from the index without touching the table
+MAPPING_INDEXES = {
+    "idx_mappings_rank_department_outcome": "institution_rank, department, outcome",
+    "idx_mappings_department_field_outcome": "department, field, outcome",
+    "idx_mappings_outcome": "outcome",
+}
+
+# Indexes on the jobs database for location lookups and freshness queries (created by Scrape_jobs.create_db)
+JOBS_INDEXES = {
+    "idx_jobs_company_location": "company_location",
+    "idx_jobs_last_seen": "last_seen",
+}
+
+# Precomputed outcome counts: table -> grouping columns (each also grouped by outcome)
+AGGREGATES = {
+    "outcome_counts_by_institution": ['institution_rank', 'institution_name'],
+    "outcome_counts_by_department": ['department'],
+    "outcome_counts_by_field": ['field'],
+}
+
+# Declared types of the grouping columns, matching student_institution_mappings
+COLUMN_TYPES = {'institution_rank': 'INTEGER', 'institution_name': 'TEXT', 'department': 'TEXT', 'field': 'TEXT'}
+
+# Short names for the --by option
+AGGREGATE_NAMES = {'institution': "outcome_counts_by_institution",
+                   'department': "outcome_counts_by_department",
+                   'field': "outcome_counts_by_field"}
+
+def ensure_indexes(conn, table, indexes):
+    """Create the named indexes on table if they don't exist yet."""
+    for name, columns in indexes.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns});")
+    conn.commit()
+
+class AggregateCounter:
+    """Outcome counts accumulated chunk by chunk while mappings are written, so no table rescan is needed."""
+
+    def __init__(self):
+        outcome = MAPPING_COLUMNS.index('outcome')
+        self._keys = {table: [MAPPING_COLUMNS.index(c) for c in columns] + [outcome]
+                      for table, columns in AGGREGATES.items()}
+        self.counts = {table: Counter() for table in AGGREGATES}
+
+    def update(self, rows):
+        """Add one chunk of mapping rows to the counts."""
+        for table, positions in self._keys.items():
+            self.counts[table].update(tuple(row[i] for i in positions) for row in rows)
+
+    def write(self, cursor, suffix=""):
+        """Write the counts into fresh aggregate tables (named <table><suffix>)."""
+        for table, columns in AGGREGATES.items():
+            create_aggregate_table(cursor, table + suffix, columns)
+            cursor.executemany(
+                f"INSERT INTO {table + suffix} ({', '.join(columns)}, outcome, count) "
+                f"VALUES ({', '.join('?' * (len(columns) + 2))});",
+                [(*key, count) for key, count in self.counts[table].items()])
+
+def create_aggregate_table(cursor, name, columns):
+    cursor.execute(f"DROP TABLE IF EXISTS {name};")
+    declared = ', '.join(f"{column} {COLUMN_TYPES[column]}" for column in columns)
+    cursor.execute(f"CREATE TABLE {name} ({declared}, outcome TEXT, count INTEGER);")
+
+def swap_aggregates(cursor, suffix="_new"):
+    """Replace the live aggregate tables with the staged ones (call inside the swap transaction)."""
+    for table in AGGREGATES:
+        cursor.execute(f"DROP TABLE IF EXISTS {table};")
+        cursor.execute(f"ALTER TABLE {table + suffix} RENAME TO {table};")
+
+def refresh_aggregates(db_name="mapped_data.db"):
+    """Rebuild the aggregate tables from student_institution_mappings (for databases written before they existed)."""
+    conn = sqlite3.connect(db_name)
+    ensure_indexes(conn, "student_institution_mappings", MAPPING_INDEXES)
+    with conn:
+        # Explicit, since sqlite3 opens no transaction for the DROP/CREATE, and readers must not see them missing
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE;")
+        for table, columns in AGGREGATES.items():
+            group = ', '.join(columns + ['outcome'])
+            create_aggregate_table(cursor, table, columns)
+            cursor.execute(f"INSERT INTO {table} SELECT {group}, COUNT(*) FROM student_institution_mappings "
+                           f"GROUP BY {group};")
+    conn.close()
+
+def outcome_counts(db_name="mapped_data.db", by='department'):
+    """Outcome counts per institution, department or field, read from the precomputed tables.
+
+    Returns {group: {outcome: count}}; group is a (rank, name) tuple for institutions.
+    """
+    table = AGGREGATE_NAMES[by]
+    conn = sqlite3.connect(db_name)
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?;", (table,)).fetchone()
+    conn.close()
+    if not exists:
+        refresh_aggregates(db_name)
+
+    columns = AGGREGATES[table]
+    conn = sqlite3.connect(db_name)
+    counts = {}
+    for *group, outcome, count in conn.execute(f"SELECT {', '.join(columns)}, outcome, count FROM {table} "
+                                               f"ORDER BY {', '.join(columns)};"):
+        key = tuple(group) if len(group) > 1 else group[0]
+        counts.setdefault(key, {})[outcome] = count
+    conn.close()
+    return counts
+
+def _where(filters):
+    """Build an AND-ed equality WHERE clause from the filters that are set."""
+    filters = {column: value for column, value in filters.items() if value is not None}
+    clause = ''.join(f" AND {column} = ?" for column in filters)
+    return clause, list(filters.values())
+
+def page_mappings(db_name="mapped_data.db", after_id=0, page_size=100, institution_rank=None,
+                  department=None, field=None, outcome=None):
+    """One page of mappings after after_id, optionally filtered.
+
+    Keyset pagination: pass the returned next_id back as after_id. Returns (rows, next_id);
+    next_id is None on the last page.
+    """
+    clause, params = _where({'institution_rank': institution_rank, 'department': department,
+                             'field': field, 'outcome': outcome})
+    conn = sqlite3.connect(db_name)
+    rows = conn.execute(f"SELECT id, {', '.join(MAPPING_COLUMNS)} FROM student_institution_mappings "
+                        f"WHERE id > ?{clause} ORDER BY id LIMIT ?;", [after_id, *params, page_size]).fetchall()
+    conn.close()
+    next_id = rows[-1][0] if len(rows) == page_size else None
+    return rows, next_id
+
+def page_jobs(db_name="jobs.db", after_id=0, page_size=100, company_location=None):
+    """One page of scraped jobs after after_id, optionally for one location; returns (rows, next_id)."""
+    clause, params = _where({'company_location': company_location})
+    conn = sqlite3.connect(db_name)
+    rows = conn.execute(f"SELECT id, title, company_location, url, job_id, salary, first_seen, last_seen FROM jobs "
+                        f"WHERE id > ?{clause} ORDER BY id LIMIT ?;", [after_id, *params, page_size]).fetchall()
+    conn.close()
+    next_id = rows[-1][0] if len(rows) == page_size else None
+    return rows, next_id
+
+# Main execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the mapped database without full-table scans.")
+    parser.add_argument('--db', default="mapped_data.db")
+    parser.add_argument('--by', choices=list(AGGREGATE_NAMES), help="print outcome counts per institution/department/field")
+    parser.add_argument('--refresh', action='store_true', help="rebuild the aggregate tables first")
+    parser.add_argument('--after', type=int, default=0, help="print the page of mappings after this id")
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--institution-rank', type=int)
+    parser.add_argument('--department')
+    parser.add_argument('--outcome')
+    args = parser.parse_args()
+
+    if args.refresh:
+        refresh_aggregates(args.db)
+
+    if args.by:
+        for group, counts in outcome_counts(args.db, args.by).items():
+            print(f"{group}: " + ", ".join(f"{outcome}: {count}" for outcome, count in sorted(counts.items())))
+    else:
+        rows, next_id = page_mappings(args.db, args.after, args.page_size, args.institution_rank,
+                                      args.department, outcome=args.outcome)
+        for row in rows:
+            print(row)
+        print(f"next page: --after {next_id}" if next_id is not None else "last page")
@@ -0,0 +1,95 @@
+import glob
+import os
+import sqlite3
+import numpy as np
+
+# Optional columnar backend for the exported dataset
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Codes and column order are shared with serving through features.py
+from features import DEPARTMENT_CODES, FIELD_CODES, OUTCOME_CODES, FEATURE_COLUMNS
+
+# Category columns and their codes
+CATEGORY_CODES = {'department': DEPARTMENT_CODES, 'field': FIELD_CODES, 'outcome': OUTCOME_CODES}
+
+def require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow is required for the Parquet/Arrow dataset")
+
+def dataset_files(path):
+    """The data files of an exported dataset directory (or a single file), in order."""
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, 'part-*.parquet')) + glob.glob(os.path.join(path, 'part-*.arrow')))
+    return [path]
+
+def _read_table(path, columns):
+    """Read the projected columns of one file, memory-mapped."""
+    if path.endswith('.arrow'):
+        # Arrow IPC buffers are used in place from the mapping
+        with pa.memory_map(path, 'r') as source:
+            return pa.ipc.open_file(source).read_all().select(columns)
+    return pq.read_table(path, columns=columns, memory_map=True)
+
+def _column_codes(column, codes):
+    """Integer codes of a dictionary-encoded (or plain string) column."""
+    column = column.combine_chunks() if isinstance(column, pa.ChunkedArray) else column
+    if not pa.types.is_dictionary(column.type):
+        column = column.dictionary_encode()
+    # Dictionaries are tiny: translate them once, then index with the per-row codes
+    lookup = np.array([codes[value] for value in column.dictionary.to_pylist()], dtype=np.int64)
+    return lookup[column.indices.to_numpy(zero_copy_only=False)]
+
+def load_feature_matrix(path, columns=FEATURE_COLUMNS, target='outcome', dtype=np.float32):
+    """Load only the model's columns of an exported dataset into an (n, len(columns)) matrix.
+
+    Returns (X, y); y holds outcome codes, or is None when target is None.
+    """
+    require_pyarrow()
+    read = list(columns) + ([target] if target else [])
+    tables = [_read_table(f, read) for f in dataset_files(path)]
+    n_rows = sum(t.num_rows for t in tables)
+
+    X = np.empty((n_rows, len(columns)), dtype=dtype)
+    y = np.empty(n_rows, dtype=np.int64) if target else None
+    offset = 0
+    for table in tables:
+        end = offset + table.num_rows
+        for j, name in enumerate(columns):
+            if name in CATEGORY_CODES:
+                X[offset:end, j] = _column_codes(table.column(name), CATEGORY_CODES[name])
+            else:
+                X[offset:end, j] = table.column(name).to_numpy()
+        if target:
+            y[offset:end] = _column_codes(table.column(target), CATEGORY_CODES[target])
+        offset = end
+    return X, y
+
+def load_feature_matrix_sqlite(db_name="mapped_data.db", columns=FEATURE_COLUMNS, target='outcome',
+                               dtype=np.float32, batch_size=100_000):
+    """Same as load_feature_matrix, reading student_institution_mappings directly."""
+    conn = sqlite3.connect(db_name)
+    read = list(columns) + ([target] if target else [])
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT {', '.join(read)} FROM student_institution_mappings ORDER BY id;")
+
+    X_blocks, y_blocks = [], []
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            break
+        block = np.empty((len(batch), len(columns)), dtype=dtype)
+        for j, name in enumerate(columns):
+            values = [row[j] for row in batch]
+            block[:, j] = [CATEGORY_CODES[name][v] for v in values] if name in CATEGORY_CODES else values
+        X_blocks.append(block)
+        if target:
+            y_blocks.append(np.array([OUTCOME_CODES[row[-1]] for row in batch], dtype=np.int64))
+    conn.close()
+
+    X = np.vstack(X_blocks) if X_blocks else np.empty((0, len(columns)), dtype=dtype)
+    y = (np.concatenate(y_blocks) if y_blocks else np.empty(0, dtype=np.int64)) if target else None
+    return X, y
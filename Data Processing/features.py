@@ -0,0 +1,179 @@
+import numpy as np
+from scoring import WEIGHT_PROFILES
+
+# Integer codes the model is trained on (same as the notebook's .map dictionaries)
+DEPARTMENT_CODES = {'Computer Science': 0, 'Electronics': 1, 'Mechanical': 2, 'Civil': 3, 'Electrical': 4}
+FIELD_CODES = {'IT': 0, 'Non-IT': 1}
+OUTCOME_CODES = {'Selected': 0, 'Rejected': 1, 'No Offer': 2}
+
+# Departments whose students are in the IT field (student.py assign_field)
+IT_DEPARTMENTS = ['Computer Science', 'Electronics']
+
+# Model features, in training column order
+FEATURE_COLUMNS = ['cgpa', 'project_score', 'internships', 'extracurricular_score',
+                   'total_score', 'department', 'field']
+
+# Raw inputs a client must provide; field is optional and total_score is always derived
+RAW_COLUMNS = ['cgpa', 'project_score', 'internships', 'extracurricular_score', 'department']
+
+def default_spec():
+    """The feature layout used by training, as a JSON-serializable dict."""
+    return {
+        'columns': list(FEATURE_COLUMNS),
+        'department_codes': dict(DEPARTMENT_CODES),
+        'field_codes': dict(FIELD_CODES),
+        'it_departments': list(IT_DEPARTMENTS),
+        'score_weights': dict(WEIGHT_PROFILES['mapping']),
+        'dtype': 'float32',
+    }
+
+class FeatureTransformer:
+    """Turn raw student inputs into the model's feature matrix, the same way in training and serving."""
+
+    def __init__(self, spec=None):
+        """Build lookup tables from a spec (default_spec() unless one is loaded with a model)."""
+        self.spec = spec or default_spec()
+        self.columns = self.spec['columns']
+        self.dtype = np.dtype(self.spec['dtype'])
+
+        # Sorted names and their codes, for vectorized lookup with searchsorted
+        self._lookups = {name: self._lookup(self.spec[f'{name}_codes']) for name in ('department', 'field')}
+
+        # Field code per department code, for clients that send only the department
+        it_codes = {self.spec['department_codes'][d] for d in self.spec['it_departments']}
+        max_code = max(self.spec['department_codes'].values())
+        self._field_by_department = np.array(
+            [self.spec['field_codes']['IT' if code in it_codes else 'Non-IT'] for code in range(max_code + 1)])
+
+    @staticmethod
+    def _lookup(codes):
+        names = sorted(codes)
+        return np.array(names), np.array([codes[n] for n in names])
+
+    def to_dict(self):
+        return dict(self.spec)
+
+    @classmethod
+    def from_dict(cls, spec):
+        return cls(spec)
+
+    def encode(self, name, values):
+        """Map department or field names (or already-encoded codes) to their integer codes."""
+        names, codes = self._lookups[name]
+        values = np.asarray(values)
+        if values.dtype.kind in 'iuf':
+            encoded = values.astype(np.int64)
+            if (encoded != values).any() or not np.isin(encoded, codes).all():
+                raise ValueError(f"unknown {name} code")
+            return encoded
+
+        values = values.astype(str)
+        idx = np.searchsorted(names, values).clip(0, len(names) - 1)
+        encoded = codes[idx]
+        found = names[idx] == values
+        if not found.all():
+            # Codes sent as strings (form fields, records mixing names and codes)
+            rest = values[~found]
+            digits = np.char.isdigit(rest)
+            if not digits.all():
+                raise ValueError(f"unknown {name}: {rest[~digits][0]}")
+            rest = rest.astype(np.int64)
+            if not np.isin(rest, codes).all():
+                raise ValueError(f"unknown {name} code")
+            encoded[~found] = rest
+        return encoded
+
+    def derive_field(self, department):
+        """Field code(s) for department code(s), as student.py assigns them."""
+        return self._field_by_department[department]
+
+    def _columns(self, data):
+        """Accept a list of records or a dict of columns; return a dict of columns."""
+        if isinstance(data, dict) and 'records' in data:
+            data = data['records']
+        if isinstance(data, list):
+            for i, record in enumerate(data):
+                if not isinstance(record, dict):
+                    raise ValueError(f"record {i} is not an object")
+                missing = [c for c in RAW_COLUMNS if c not in record]
+                if missing:
+                    raise ValueError(f"record {i} is missing {', '.join(missing)}")
+            columns = {c: [record[c] for record in data] for c in RAW_COLUMNS}
+            if any('field' in record for record in data):
+                # None marks the records whose field is derived from their department
+                columns['field'] = [record.get('field') for record in data]
+            return columns
+        if isinstance(data, dict):
+            missing = [c for c in RAW_COLUMNS if c not in data]
+            if missing:
+                raise ValueError(f"payload is missing {', '.join(missing)}")
+            return data
+        raise ValueError("expected a list of records or an object of columns")
+
+    def _field(self, values, department):
+        """Encode the given field values, deriving the missing (None) ones from department."""
+        if values is None:
+            return self.derive_field(department)
+        values = np.asarray(values)
+        if values.dtype != object:
+            return self.encode('field', values)
+        given = np.array([value is not None for value in values], dtype=bool)
+        field = self.derive_field(department)
+        if given.any():
+            field[given] = self.encode('field', values[given].tolist())
+        return field
+
+    def transform(self, data):
+        """Build the (n, 7) feature matrix from raw inputs.
+
+        data is a list of records or a dict of columns with cgpa, project_score, internships,
+        extracurricular_score, department and optionally field (names or codes). total_score is
+        always derived here, and field is derived from department for rows that omit it or send null.
+        """
+        columns = self._columns(data)
+        numeric = {c: np.asarray(columns[c], dtype=np.float64) for c in RAW_COLUMNS if c != 'department'}
+        lengths = {len(v) for v in numeric.values()} | {len(columns['department'])}
+        if 'field' in columns:
+            lengths.add(len(columns['field']))
+        if len(lengths) != 1:
+            raise ValueError("all columns must have the same length")
+        if not lengths.pop():
+            raise ValueError("payload contains no rows")
+        if not all(np.isfinite(v).all() for v in numeric.values()):
+            raise ValueError("payload contains non-numeric or non-finite values")
+
+        department = self.encode('department', columns['department'])
+        field = self._field(columns.get('field'), department)
+        weights = self.spec['score_weights']
+        derived = {
+            **numeric,
+            # Same expression and evaluation order as Mapping.py's total_score
+            'total_score': (numeric['cgpa'] * weights['cgpa'] + numeric['project_score'] * weights['project_score'] +
+                            numeric['internships'] * weights['internships'] +
+                            numeric['extracurricular_score'] * weights['extracurricular_score']),
+            'department': department,
+            'field': field,
+        }
+
+        X = np.empty((len(department), len(self.columns)), dtype=self.dtype)
+        for j, name in enumerate(self.columns):
+            X[:, j] = derived[name]
+        return X
+
+    def transform_one(self, cgpa, project_score, internships, extracurricular_score, department, field=None):
+        """Feature row for a single student."""
+        columns = {'cgpa': [cgpa], 'project_score': [project_score], 'internships': [internships],
+                   'extracurricular_score': [extracurricular_score], 'department': [department]}
+        if field is not None:
+            columns['field'] = [field]
+        return self.transform(columns)[0]
+
+def unpack_artifact(artifact):
+    """Split a loaded model artifact into (model, feature spec).
+
+    train.py saves {'model', 'features', 'version'}; older artifacts are a bare estimator and
+    get the default spec they were trained with.
+    """
+    if isinstance(artifact, dict) and 'model' in artifact:
+        return artifact['model'], artifact.get('features') or default_spec()
+    return artifact, default_spec()
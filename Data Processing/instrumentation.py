@@ -0,0 +1,282 @@
+import atexit
+import json
+import os
+import sys
+import threading
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter, sleep
+
+# Latency histogram bucket bounds, in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# Off unless METRICS=1, METRICS_FILE or PROFILE_STAGE is set (or enable() is called); when off a span
+# costs one global lookup
+METRICS_FILE = os.environ.get('METRICS_FILE')
+PROFILE_STAGE = os.environ.get('PROFILE_STAGE')
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL_MS', 5)) / 1000
+ENABLED = os.environ.get('METRICS') == '1' or bool(METRICS_FILE) or bool(PROFILE_STAGE)
+
+class Histogram:
+    """Bucketed latency counts plus their sum, as Prometheus histograms keep them."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # Last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Registry:
+    """Thread-safe store of per-stage latency histograms and counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.counters = Counter()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name, stage, amount=1):
+        with self._lock:
+            self.counters[(name, stage)] += amount
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def snapshot(self):
+        """Plain-dict copy of every metric, for JSON dumps."""
+        with self._lock:
+            stages = {stage: {'count': h.count, 'sum_seconds': h.sum,
+                              'buckets': dict(zip([*map(str, BUCKETS), '+Inf'], h.counts))}
+                      for stage, h in self.histograms.items()}
+            counters = {}
+            for (name, stage), value in self.counters.items():
+                counters.setdefault(name, {})[stage] = value
+        return {'stages': stages, 'counters': counters}
+
+    def render_prometheus(self):
+        """Metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            if self.histograms:
+                lines += ["# HELP stage_duration_seconds Time spent in each instrumented stage.",
+                          "# TYPE stage_duration_seconds histogram"]
+            for stage, h in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip([*map(str, BUCKETS), '+Inf'], h.counts):
+                    cumulative += count
+                    lines.append(f'stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'stage_duration_seconds_sum{{stage="{stage}"}} {h.sum}')
+                lines.append(f'stage_duration_seconds_count{{stage="{stage}"}} {h.count}')
+
+            names = sorted({name for name, _ in self.counters})
+            for name in names:
+                lines += [f"# HELP stage_{name}_total {name.replace('_', ' ').capitalize()} counted per stage.",
+                          f"# TYPE stage_{name}_total counter"]
+                for (counter, stage), value in sorted(self.counters.items()):
+                    if counter == name:
+                        lines.append(f'stage_{name}_total{{stage="{stage}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+# Innermost span or timed step running in this thread or asyncio task, so time spent in a nested
+# stage is reported under that stage and not again under the one around it
+_current = ContextVar('instrumentation_current', default=None)
+
+def enable(flag=True):
+    """Turn recording on or off at runtime."""
+    global ENABLED
+    ENABLED = flag
+
+def count(name, stage, amount=1):
+    """Add to a named counter (e.g. 'rows', 'errors', 'pages') for a stage."""
+    if ENABLED:
+        REGISTRY.inc(name, stage, amount)
+
+class span:
+    """Time a stage as a context manager (instrument is the decorator form).
+
+        with span('fetch_students') as s:
+            rows = ...
+            s.add_rows(len(rows))
+
+    Records the stage's latency (less any nested spans), its rows and an error count if it raises.
+    """
+
+    __slots__ = ('stage', 'rows', 'start', 'profiler', 'child', 'token')
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.rows = 0
+        self.start = None
+        self.profiler = None
+        self.child = 0.0
+        self.token = None
+
+    def add_rows(self, n):
+        self.rows += n
+
+    def __enter__(self):
+        if ENABLED:
+            if self.stage == PROFILE_STAGE:
+                self.profiler = SamplingProfiler.start_for(self.stage)
+            self.token = _current.set(self)
+            self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.start is None:
+            return False
+        elapsed = perf_counter() - self.start
+        _current.reset(self.token)
+        parent = _current.get()
+        if parent is not None:
+            parent.child += elapsed
+        # Concurrent nested spans (e.g. gathered asyncio tasks) can add up to more than the wall time
+        REGISTRY.observe(self.stage, max(elapsed - self.child, 0.0))
+        if self.rows:
+            REGISTRY.inc('rows', self.stage, self.rows)
+        if exc_type is not None:
+            REGISTRY.inc('errors', self.stage)
+        if self.profiler is not None:
+            self.profiler.stop()
+        return False
+
+def instrument(stage, rows=None):
+    """Decorator form of span; rows(result) gives the row count of a call's result (e.g. len)."""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with span(stage) as s:
+                result = func(*args, **kwargs)
+                if rows is not None:
+                    s.add_rows(rows(result))
+                return result
+        return wrapper
+    return decorate
+
+class _Step:
+    """One next() of a timed iterator, collecting the time nested stages take inside it."""
+
+    __slots__ = ('child',)
+
+    def __init__(self):
+        self.child = 0.0
+
+def timed(stage, iterable):
+    """Time a streamed stage (e.g. a generator consumed chunk by chunk further down the pipeline).
+
+    Only the time spent producing items counts, not the consumer's work between them; the total is
+    recorded as one observation with the item count as rows once the iterable is exhausted.
+    """
+    if not ENABLED:
+        return iterable
+    return _timed(stage, iter(iterable))
+
+def _timed(stage, iterator):
+    profiler = SamplingProfiler.start_for(stage) if stage == PROFILE_STAGE else None
+    seconds, rows = 0.0, 0
+    try:
+        while True:
+            step = _Step()
+            token = _current.set(step)
+            start = perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            except BaseException:
+                REGISTRY.inc('errors', stage)
+                raise
+            finally:
+                elapsed = perf_counter() - start
+                _current.reset(token)
+                parent = _current.get()
+                if parent is not None:
+                    parent.child += elapsed
+                seconds += elapsed - step.child
+            rows += 1
+            yield item
+    finally:
+        REGISTRY.observe(stage, seconds)
+        if rows:
+            REGISTRY.inc('rows', stage, rows)
+        if profiler is not None:
+            profiler.stop()
+
+class SamplingProfiler:
+    """Sample one thread's stack at a fixed interval and write collapsed stacks for flame graphs.
+
+    Output lines are "outer;...;inner count", the input format of flamegraph.pl and speedscope.
+    """
+
+    _active = None
+    _lock = threading.Lock()
+
+    def __init__(self, stage, thread_id, interval=PROFILE_INTERVAL):
+        self.stage = stage
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name=f'profiler-{stage}', daemon=True)
+
+    @classmethod
+    def start_for(cls, stage):
+        """Profile the calling thread, unless another call of a profiled stage already is."""
+        with cls._lock:
+            if cls._active is not None:
+                return None
+            cls._active = profiler = cls(stage, threading.get_ident())
+        profiler._thread.start()
+        return profiler
+
+    def _sample(self):
+        while not self._stopped.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+            sleep(self.interval)
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        path = os.environ.get('PROFILE_OUTPUT') or f"{self.stage}.folded"
+        with open(path, 'a') as f:
+            for stack, samples in self.stacks.items():
+                f.write(f"{stack} {samples}\n")
+        with SamplingProfiler._lock:
+            SamplingProfiler._active = None
+
+def dump(path):
+    """Write the metrics to a file: JSON for *.json, Prometheus text (textfile collector format) otherwise."""
+    with open(path, 'w') as f:
+        if path.endswith('.json'):
+            json.dump(REGISTRY.snapshot(), f, indent=2)
+        else:
+            f.write(REGISTRY.render_prometheus())
+
+# Batch scripts dump their metrics on exit when METRICS_FILE is set
+if METRICS_FILE:
+    atexit.register(dump, METRICS_FILE)
@@ -0,0 +1,334 @@
+import argparse
+import math
+import os
+import re
+import sqlite3
+import sys
+import unicodedata
+from collections import Counter, defaultdict
+from time import perf_counter
+
+# Shares the NIRF parser's pattern for the "More Details" popup text
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data Acquisition'))
+from nirf_parser import MORE_DETAILS
+
+# Link output, rebuilt from scratch on every run
+LINKED_DB = "linked.db"
+
+# Common alternate spellings, mapped to one city key
+CITY_ALIASES = {
+    'bangalore': 'bengaluru', 'bombay': 'mumbai', 'navi mumbai': 'mumbai', 'madras': 'chennai',
+    'calcutta': 'kolkata', 'gurgaon': 'gurugram', 'new delhi': 'delhi', 'trivandrum': 'thiruvananthapuram',
+    'mysore': 'mysuru', 'mangalore': 'mangaluru', 'poona': 'pune', 'baroda': 'vadodara',
+    'cochin': 'kochi', 'pondicherry': 'puducherry', 'vizag': 'visakhapatnam', 'belgaum': 'belagavi',
+}
+
+# Abbreviations expanded before names are compared
+NAME_ABBREVIATIONS = {
+    'engg': 'engineering', 'engr': 'engineering', 'tech': 'technology', 'inst': 'institute',
+    'univ': 'university', 'sci': 'science', 'mgmt': 'management', 'natl': 'national', 'coll': 'college',
+}
+
+# Legal suffixes that don't distinguish one company from another
+COMPANY_SUFFIXES = {'ltd', 'limited', 'pvt', 'private', 'inc', 'llp', 'llc', 'corp', 'corporation', 'co', 'plc'}
+
+# Decorations Indeed puts around a job's location
+REMOTE_PREFIX = re.compile(r'^(remote|hybrid work|hybrid remote|temporarily remote|hybrid)(\s+in\s+|$)', re.I)
+MORE_LOCATIONS = re.compile(r'\s*\+\s*\d+\s+locations?$', re.I)
+POSTAL_CODE = re.compile(r'\s*\d{6}$')
+
+def name_key(name):
+    """Normalized form of an institution or company name, used for matching."""
+    if not name:
+        return ''
+    name = MORE_DETAILS.sub('', name)
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode()
+    name = name.lower().replace('&', ' and ')
+    name = re.sub(r'[^a-z0-9]+', ' ', name)
+    return ' '.join(NAME_ABBREVIATIONS.get(word, word) for word in name.split())
+
+def company_key(name):
+    """name_key without legal suffixes, so "Acme Pvt Ltd" and "Acme Limited" match."""
+    words = name_key(name).split()
+    while len(words) > 1 and words[-1] in COMPANY_SUFFIXES:
+        words.pop()
+    return ' '.join(words)
+
+def city_key(city):
+    """Normalized city name, with alternate spellings folded together."""
+    key = ' '.join(re.sub(r'[^a-z ]+', ' ', (city or '').lower()).split())
+    return CITY_ALIASES.get(key, key) or None
+
+def parse_location(company_location):
+    """Split a jobs.company_location string into (company, city, state, remote).
+
+    The scraped text is the company name, an optional rating and the location on separate lines,
+    e.g. "Acme Ltd\\n4.1\\nHybrid work in Bengaluru, Karnataka 560001".
+    """
+    lines = [line.strip() for line in (company_location or '').splitlines() if line.strip()]
+    if not lines:
+        return None, None, None, False
+    company = lines[0] if len(lines) > 1 else None
+    location = lines[-1]
+
+    remote = bool(REMOTE_PREFIX.match(location))
+    location = REMOTE_PREFIX.sub('', location)
+    location = POSTAL_CODE.sub('', MORE_LOCATIONS.sub('', location)).strip()
+    if location.lower() in ('', 'india'):
+        return company, None, None, remote
+
+    parts = [part.strip() for part in location.split(',')]
+    state = parts[1] if len(parts) > 1 else None
+    return company, city_key(parts[0]), state, remote
+
+def trigrams(key):
+    """Character trigrams of a key, padded so short words still produce some."""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class UnionFind:
+    """Disjoint sets over 0..n-1 with path halving and union by size."""
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+
+def dedupe(keys, blocks=None, threshold=0.85):
+    """Cluster near-duplicate keys; returns a cluster id (a representative index) per key.
+
+    Pairs with trigram Jaccard similarity >= threshold are merged, unless the numbers in them
+    differ ("Campus 1" and "Campus 11" are different places). Candidates come from an inverted
+    index over each key's rarest trigrams only (prefix filtering: two sets this similar must
+    share one of them), within the same block (e.g. city), so the work grows with the number of
+    plausible pairs rather than n^2.
+    """
+    blocks = blocks or [None] * len(keys)
+    numbers = [re.findall(r'\d+', key) for key in keys]
+    grams = [trigrams(key) for key in keys]
+    frequency = Counter(gram for gram_set in grams for gram in gram_set)
+
+    postings = defaultdict(list)
+    clusters = UnionFind(len(keys))
+    for i, (gram_set, block) in enumerate(zip(grams, blocks)):
+        size = len(gram_set)
+        prefix = sorted(gram_set, key=lambda gram: (frequency[gram], gram))[:size - math.ceil(threshold * size) + 1]
+
+        candidates = set()
+        for gram in prefix:
+            posting = postings[(block, gram)]
+            candidates.update(posting)
+            posting.append(i)
+
+        for j in candidates:
+            # Length filter, then exact Jaccard
+            other = grams[j]
+            if min(size, len(other)) < threshold * max(size, len(other)) or numbers[i] != numbers[j]:
+                continue
+            common = len(gram_set & other)
+            if common / (size + len(other) - common) >= threshold:
+                clusters.union(i, j)
+
+    return [clusters.find(i) for i in range(len(keys))]
+
+def attach(conn, alias, path):
+    """ATTACH a source database; returns False if it doesn't exist."""
+    if not os.path.exists(path):
+        print(f"{path} not found, its links will be empty")
+        return False
+    conn.execute(f"ATTACH DATABASE ? AS {alias};", (path,))
+    return True
+
+def has_table(conn, alias, table):
+    """Whether the database attached as alias has table; False if alias wasn't attached."""
+    if alias not in {row[1] for row in conn.execute("PRAGMA database_list;")}:
+        return False
+    return conn.execute(f"SELECT 1 FROM {alias}.sqlite_master WHERE type='table' AND name=?;",
+                        (table,)).fetchone() is not None
+
+def link_institutions(conn):
+    """Cluster NIRF rows (all years and categories) into institution entities.
+
+    Returns {name key: entity id} for joining other stores' institution names.
+    """
+    conn.execute("""
+    CREATE TABLE institutions_linked (
+        nirf_id INTEGER PRIMARY KEY, entity_id INTEGER, name_key TEXT, city TEXT,
+        year INTEGER, category TEXT, rank INTEGER
+    );""")
+    conn.execute("""
+    CREATE TABLE institution_entities (
+        entity_id INTEGER PRIMARY KEY, name TEXT, city TEXT, state TEXT, best_rank INTEGER
+    );""")
+    if not has_table(conn, 'nirf', 'institutions'):
+        return {}
+
+    # Newest first, so an entity is named as it was last ranked
+    rows = conn.execute("""
+    SELECT id, institution_name, city, state, year, category, CAST(rank AS INTEGER)
+    FROM nirf.institutions ORDER BY year DESC, id;
+    """).fetchall()
+
+    # Deduplicate the distinct (name, city) keys, comparing names only within a city
+    keys = [(name_key(row[1]), city_key(row[2])) for row in rows]
+    distinct = list(dict.fromkeys(keys))
+    cluster = dedupe([name for name, _ in distinct], [city for _, city in distinct])
+    entity_of = {key: cluster[i] for i, key in enumerate(distinct)}
+
+    entities = {}
+    for (_, name, _, state, _, _, rank), key in zip(rows, keys):
+        entity = entities.setdefault(entity_of[key], [MORE_DETAILS.sub('', name or '').strip(), key[1], state, rank])
+        if rank is not None and (entity[3] is None or rank < entity[3]):
+            entity[3] = rank
+
+    conn.executemany("INSERT INTO institutions_linked VALUES (?, ?, ?, ?, ?, ?, ?);", [
+        (row[0], entity_of[key], key[0], key[1], row[4], row[5], row[6]) for row, key in zip(rows, keys)])
+    conn.executemany("INSERT INTO institution_entities VALUES (?, ?, ?, ?, ?);",
+                     [(entity_id, *entity) for entity_id, entity in entities.items()])
+    return {key[0]: entity for key, entity in entity_of.items()}
+
+def link_jobs(conn):
+    """Parse job locations and cluster company names into company entities."""
+    conn.execute("""
+    CREATE TABLE jobs_linked (
+        job_rowid INTEGER PRIMARY KEY, job_id TEXT, company_entity INTEGER, city TEXT, state TEXT, remote INTEGER
+    );""")
+    conn.execute("CREATE TABLE company_entities (entity_id INTEGER PRIMARY KEY, name TEXT);")
+    if not has_table(conn, 'jobs', 'jobs'):
+        return
+
+    parsed = [(rowid, job_id, *parse_location(location))
+              for rowid, job_id, location in conn.execute("SELECT id, job_id, company_location FROM jobs.jobs;")]
+
+    # Deduplicate distinct company keys; an entity is named after its first spelling seen
+    names = {}
+    for _, _, company, *_ in parsed:
+        if company:
+            names.setdefault(company_key(company), company)
+    distinct = list(names)
+    cluster = dedupe(distinct)
+    entity_of = dict(zip(distinct, cluster))
+
+    conn.executemany("INSERT INTO jobs_linked VALUES (?, ?, ?, ?, ?, ?);", [
+        (rowid, job_id, entity_of[company_key(company)] if company else None, city, state, int(remote))
+        for rowid, job_id, company, city, state, remote in parsed])
+    conn.executemany("INSERT INTO company_entities VALUES (?, ?);",
+                     [(entity, names[distinct[entity]]) for entity in sorted(set(cluster))])
+
+def link_outcomes(conn, entity_of):
+    """Student counts per institution entity, from mapped_data.db's outcome aggregates."""
+    conn.execute("CREATE TABLE institution_outcomes (entity_id INTEGER PRIMARY KEY, students INTEGER, selected INTEGER);")
+    if has_table(conn, 'mapped', 'outcome_counts_by_institution'):
+        rows = conn.execute("SELECT institution_name, outcome, count FROM mapped.outcome_counts_by_institution;")
+    elif has_table(conn, 'mapped', 'student_institution_mappings'):
+        rows = conn.execute("SELECT institution_name, outcome, COUNT(*) FROM mapped.student_institution_mappings "
+                            "GROUP BY institution_name, outcome;")
+    else:
+        return
+
+    totals = defaultdict(lambda: [0, 0])
+    for name, outcome, count in rows:
+        entity = entity_of.get(name_key(name))
+        if entity is not None:
+            totals[entity][0] += count
+            totals[entity][1] += count if outcome == 'Selected' else 0
+    conn.executemany("INSERT INTO institution_outcomes VALUES (?, ?, ?);",
+                     [(entity, *counts) for entity, counts in totals.items()])
+
+def materialize_cities(conn):
+    """Per-city rollups and their join, indexed for dashboard lookups."""
+    conn.executescript("""
+    CREATE TABLE city_jobs AS
+    SELECT city, MAX(state) AS state, COUNT(*) AS jobs, COUNT(DISTINCT company_entity) AS companies,
+           SUM(remote) AS remote_jobs
+    FROM jobs_linked WHERE city IS NOT NULL GROUP BY city;
+
+    CREATE TABLE city_institutions AS
+    SELECT e.city, MAX(e.state) AS state, COUNT(*) AS institutions, MIN(e.best_rank) AS best_rank,
+           COALESCE(SUM(o.students), 0) AS students, COALESCE(SUM(o.selected), 0) AS selected
+    FROM institution_entities e LEFT JOIN institution_outcomes o USING (entity_id)
+    WHERE e.city IS NOT NULL GROUP BY e.city;
+
+    -- Jobs per city against institutions per city
+    CREATE TABLE city_links AS
+    SELECT i.city, COALESCE(i.state, j.state) AS state, j.jobs, j.companies, j.remote_jobs,
+           i.institutions, i.best_rank, i.students, i.selected
+    FROM city_institutions i JOIN city_jobs j USING (city);
+
+    CREATE UNIQUE INDEX idx_city_jobs_city ON city_jobs (city);
+    CREATE UNIQUE INDEX idx_city_institutions_city ON city_institutions (city);
+    CREATE UNIQUE INDEX idx_city_links_city ON city_links (city);
+    CREATE INDEX idx_city_links_jobs ON city_links (jobs DESC);
+    CREATE INDEX idx_institutions_linked_entity ON institutions_linked (entity_id);
+    CREATE INDEX idx_institution_entities_city ON institution_entities (city);
+    CREATE INDEX idx_jobs_linked_city ON jobs_linked (city);
+    CREATE INDEX idx_jobs_linked_company ON jobs_linked (company_entity);
+    """)
+
+def build_links(jobs_db="jobs.db", nirf_db="nirf_rankings.db", mapped_db="mapped_data.db", out=LINKED_DB):
+    """Link the three stores into out, replacing it atomically; returns row counts per table."""
+    start = perf_counter()
+    tmp = out + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    conn = sqlite3.connect(tmp)
+    try:
+        attach(conn, 'jobs', jobs_db)
+        attach(conn, 'nirf', nirf_db)
+        attach(conn, 'mapped', mapped_db)
+        with conn:
+            entity_of = link_institutions(conn)
+            link_jobs(conn)
+            link_outcomes(conn, entity_of)
+            materialize_cities(conn)
+
+        tables = ['institutions_linked', 'institution_entities', 'jobs_linked', 'company_entities',
+                  'institution_outcomes', 'city_jobs', 'city_institutions', 'city_links']
+        counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table};").fetchone()[0] for table in tables}
+    except BaseException:
+        # Leave any previous output in place and no half-built temp file behind
+        conn.close()
+        os.remove(tmp)
+        raise
+    conn.close()
+
+    os.replace(tmp, out)
+    counts['seconds'] = perf_counter() - start
+    return counts
+
+# Main execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Link jobs, NIRF institutions and student outcomes by city.")
+    parser.add_argument('--jobs-db', default="jobs.db")
+    parser.add_argument('--nirf-db', default="nirf_rankings.db")
+    parser.add_argument('--mapped-db', default="mapped_data.db")
+    parser.add_argument('--out', default=LINKED_DB)
+    args = parser.parse_args()
+
+    counts = build_links(args.jobs_db, args.nirf_db, args.mapped_db, args.out)
+    print(f"Linked in {counts.pop('seconds'):.2f}s")
+    for table, count in counts.items():
+        print(f"{table}: {count} rows")
+
+    # Cities with both jobs and ranked institutions
+    conn = sqlite3.connect(args.out)
+    for row in conn.execute("SELECT city, jobs, companies, institutions, best_rank FROM city_links "
+                            "ORDER BY jobs DESC LIMIT 10;"):
+        print(f"City: {row[0]}, Jobs: {row[1]}, Companies: {row[2]}, Institutions: {row[3]}, Best Rank: {row[4]}")
+    conn.close()
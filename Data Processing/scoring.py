@@ -0,0 +1,88 @@
+import argparse
+import sqlite3
+import numpy as np
+
+# Student columns that feed every score, in weight-matrix row order
+SCORE_COLUMNS = ['cgpa', 'project_score', 'internships', 'extracurricular_score']
+
+# Named weight profiles
+WEIGHT_PROFILES = {
+    # Mapping.py total_score, used to rank students for allocation
+    'mapping': {'cgpa': 4, 'project_score': 2, 'internships': 1.5, 'extracurricular_score': 1},
+    # student.py weighted score, used to draw outcomes
+    'outcome': {'cgpa': 0.4, 'project_score': 0.3, 'internships': 0.2 * 10, 'extracurricular_score': 0.1},
+}
+
+def weight_matrix(profiles):
+    """Stack profiles into a (len(SCORE_COLUMNS), len(profiles)) weight matrix."""
+    return np.array([[WEIGHT_PROFILES[p][column] for p in profiles] for column in SCORE_COLUMNS], dtype=np.float64)
+
+def score_matrix(columns, profiles):
+    """Score an (n, len(SCORE_COLUMNS)) array under every profile at once: one column per profile."""
+    return np.asarray(columns, dtype=np.float64) @ weight_matrix(profiles)
+
+def score(profile, cgpa, project_score, internships, extracurricular_score):
+    """Score one student (or equal-length arrays) under a single profile."""
+    weights = WEIGHT_PROFILES[profile]
+    return (cgpa * weights['cgpa'] + project_score * weights['project_score'] +
+            internships * weights['internships'] + extracurricular_score * weights['extracurricular_score'])
+
+def sql_expression(profile):
+    """The profile as a SQL expression over the students columns, for scoring inside SQLite."""
+    weights = WEIGHT_PROFILES[profile]
+    return " + ".join(f"{column} * {weights[column]!r}" for column in SCORE_COLUMNS)
+
+def load_score_columns(db_names="students_college.db", batch_size=100_000):
+    """Read student ids and score columns once into NumPy arrays."""
+    if isinstance(db_names, str):
+        db_names = [db_names]
+
+    ids, columns = [], []
+    for db_name in db_names:
+        conn = sqlite3.connect(db_name)
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT id, {', '.join(SCORE_COLUMNS)} FROM students;")
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            block = np.array(batch, dtype=np.float64)
+            ids.append(block[:, 0].astype(np.int64))
+            columns.append(block[:, 1:])
+        conn.close()
+
+    if not ids:
+        return np.empty(0, dtype=np.int64), np.empty((0, len(SCORE_COLUMNS)))
+    return np.concatenate(ids), np.vstack(columns)
+
+def rank_by_profile(scores):
+    """Row order from best to worst for every profile column (ties keep input order)."""
+    return np.argsort(-scores, axis=0, kind='stable')
+
+def top_k_overlap(scores, k):
+    """Fraction of shared students between every pair of profiles' top k."""
+    top = rank_by_profile(scores)[:k]
+    n_profiles = scores.shape[1]
+    overlap = np.empty((n_profiles, n_profiles))
+    for a in range(n_profiles):
+        for b in range(n_profiles):
+            overlap[a, b] = len(np.intersect1d(top[:, a], top[:, b], assume_unique=True)) / max(len(top), 1)
+    return overlap
+
+# Main execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare ranking policies over the student population.")
+    parser.add_argument('student_dbs', nargs='*', default=["students_college.db"])
+    parser.add_argument('--profiles', nargs='+', default=list(WEIGHT_PROFILES), choices=list(WEIGHT_PROFILES))
+    parser.add_argument('--top', type=int, default=1000)
+    args = parser.parse_args()
+
+    # Read the population once, then score every profile in one matrix multiply
+    ids, columns = load_score_columns(args.student_dbs)
+    scores = score_matrix(columns, args.profiles)
+
+    print(f"{len(ids)} students scored under {len(args.profiles)} profiles")
+    overlap = top_k_overlap(scores, args.top)
+    for a, name in enumerate(args.profiles):
+        shared = ", ".join(f"{other}: {overlap[a, b]:.1%}" for b, other in enumerate(args.profiles) if b != a)
+        print(f"{name}: mean {scores[:, a].mean():.2f}, top {args.top} overlap with {shared}")
@@ -0,0 +1,83 @@
+import heapq
+import numpy as np
+
+def preferences_to_csr(student_index, institution_index, preference, n_students):
+    """Pack (student, institution, preference rank) triples into CSR arrays, best choice first."""
+    order = np.lexsort((preference, student_index))
+    counts = np.bincount(student_index, minlength=n_students)
+    pref_ptr = np.concatenate(([0], np.cumsum(counts)))
+    return pref_ptr, np.asarray(institution_index)[order]
+
+def deferred_acceptance(pref_ptr, pref_inst, capacities, priority):
+    """Student-proposing deferred acceptance (Gale-Shapley) with capacities.
+
+    pref_ptr/pref_inst: CSR preference lists; student s ranks pref_inst[pref_ptr[s]:pref_ptr[s + 1]]
+        best first. With pref_ptr None every student uses the single list pref_inst.
+    capacities: seats per institution.
+    priority: institutions' ranking of students, lower is better. A 1-D array is shared by every
+        institution; a 2-D array gives one row per institution.
+
+    Returns the institution index matched to each student, or -1.
+    """
+    priority = np.asarray(priority)
+    n_students = priority.shape[-1]
+    shared = priority.ndim == 1
+    prefs = np.asarray(pref_inst).tolist()
+    capacities = list(capacities)
+
+    if pref_ptr is None:
+        next_choice = [0] * n_students
+        end = [len(prefs)] * n_students
+    else:
+        ptr = np.asarray(pref_ptr).tolist()
+        next_choice = ptr[:-1]
+        end = ptr[1:]
+
+    if shared:
+        prio = priority.tolist()
+        # Propose best-first so admitted students are rarely displaced
+        free = np.argsort(priority, kind='stable')[::-1].tolist()
+    else:
+        rows = [row.tolist() for row in priority]
+        free = list(range(n_students - 1, -1, -1))
+
+    # Per institution, a heap of admitted students keyed so the worst one is on top
+    heaps = [[] for _ in capacities]
+
+    # With one shared priority and a single shared list, a full institution never admits anyone
+    # later (everyone proposing after it filled ranks below its admits), so skip it for good
+    common_list = pref_ptr is None and shared
+    first_open = 0
+
+    while free:
+        s = free.pop()
+        if shared:
+            key = (-prio[s], -s)
+        if common_list:
+            while first_open < len(prefs) and len(heaps[prefs[first_open]]) >= capacities[prefs[first_open]]:
+                first_open += 1
+            next_choice[s] = max(next_choice[s], first_open)
+
+        while next_choice[s] < end[s]:
+            i = prefs[next_choice[s]]
+            next_choice[s] += 1
+            if capacities[i] == 0:
+                continue
+            if not shared:
+                key = (-rows[i][s], -s)
+
+            heap = heaps[i]
+            if len(heap) < capacities[i]:
+                heapq.heappush(heap, key)
+                break
+            if key > heap[0]:
+                # s outranks the worst admitted student, who goes back to proposing
+                rejected = -heapq.heapreplace(heap, key)[1]
+                free.append(rejected)
+                break
+
+    assignment = np.full(n_students, -1, dtype=np.int64)
+    for i, heap in enumerate(heaps):
+        for _, negative_student in heap:
+            assignment[-negative_student] = i
+    return assignment
@@ -1,58 +1,167 @@
-from flask import Flask, request, render_template
-import joblib
-import pandas as pd
+from flask import Flask, request, render_template, jsonify, Response
+import json
+import os
+import sys
+import warnings
+import numpy as np
+from batching import MicroBatcher
+from model_loader import ModelLoader
+from prediction_cache import PredictionCache, normalize_features
 
-# Load the trained model
-model = joblib.load('model_placement_prediction')
+# Stage timers shared with the pipeline scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data Processing'))
+import instrumentation
+from instrumentation import count, instrument, span
+
+# The model was fitted on a DataFrame; batch scoring passes plain arrays
+warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+# Trained model, preferring the compiled trees written by tree_export.py.
+# It loads on first use (or here, before fork, with PRELOAD_MODEL=1) and reloads when the file changes.
+MODEL_PATH = os.environ.get('MODEL_PATH', 'model_placement_prediction')
+loader = ModelLoader(MODEL_PATH)
+if os.environ.get('PRELOAD_MODEL') == '1':
+    loader.preload()
+    loader.report('boot')
+
+# Map prediction to outcome
+outcome_map = {0: "Selected", 1: "Rejected", 2: "No Offer"}
+
+# Number of result rows serialized per streamed chunk
+STREAM_CHUNK_SIZE = 1000
+
+# Coalesce concurrent single-student predictions into one model call
+batcher = MicroBatcher(
+    lambda X: loader.get().predict_proba(X),
+    max_batch_size=int(os.environ.get('BATCH_MAX_SIZE', 64)),
+    max_wait=float(os.environ.get('BATCH_MAX_WAIT_MS', 2)) / 1000,
+)
+
+# Cache of recent predictions keyed on the normalized form inputs
+cache = PredictionCache(
+    maxsize=int(os.environ.get('CACHE_MAX_SIZE', 4096)),
+    ttl=float(os.environ['CACHE_TTL_SECONDS']) if 'CACHE_TTL_SECONDS' in os.environ else None,
+)
+
+# Per-route latency histograms for /metrics; METRICS=0 turns recording off
+instrumentation.enable(os.environ.get('METRICS', '1') != '0')
 
 # Initialize Flask app
 app = Flask(__name__)
 
+@instrument('score_matrix', rows=lambda result: len(result[0]))
+def score_matrix(X):
+    """Run a single predict_proba pass and derive labels from its argmax."""
+    model = loader.get()
+    probabilities = model.predict_proba(X)
+    best = probabilities.argmax(axis=1)
+    labels = model.classes_[best]
+    return labels, probabilities[np.arange(len(best)), best]
+
+def stream_predictions(labels, probabilities):
+    """Serialize predictions as a JSON array, one chunk of rows at a time."""
+    yield '{"predictions": ['
+    for start in range(0, len(labels), STREAM_CHUNK_SIZE):
+        chunk = [
+            json.dumps({'prediction': outcome_map[int(label)],
+                        'probability': round(float(prob) * 100, 2)})
+            for label, prob in zip(labels[start:start + STREAM_CHUNK_SIZE],
+                                   probabilities[start:start + STREAM_CHUNK_SIZE])
+        ]
+        yield (',' if start else '') + ','.join(chunk)
+    yield ']}'
+
 # Route for the home page
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def parse_form(form):
+    """Turn form fields into (cache key, feature row, cached result or None).
+
+    total_score is derived, and field from department when it is left blank.
+    """
+    cgpa = float(form['cgpa'])
+    project_score = float(form['project_score'])
+    internships = int(form['internships'])
+    extracurricular_score = float(form['extracurricular_score'])
+    features = loader.get_features()
+    department = features.encode('department', [form['department'].strip()])[0]
+    field = (features.encode('field', [form['field'].strip()])[0]
+             if form.get('field') else features.derive_field(department))
+
+    # Key on the raw inputs; the transformer applies the model's own feature layout
+    key = normalize_features(cgpa, project_score, internships, extracurricular_score, department, field)
+
+    # Reuse the stored prediction for a profile the current model has already scored
+    return key, features.transform_one(*key), cache.get(key, loader.version)
+
+def store_prediction(key, probability):
+    """Label a probability row with its most probable class and cache the result."""
+    best = int(probability.argmax())
+    prediction = loader.get().classes_[best]
+    result = (outcome_map[prediction], round(probability[best] * 100, 2))
+    cache.put(key, result, loader.version)
+    return result
+
 # Route for predictions
 @app.route('/predict', methods=['POST'])
 def predict():
     try:
-        # Get input data from the form
-        cgpa = float(request.form['cgpa'])
-        project_score = float(request.form['project_score'])
-        internships = int(request.form['internships'])
-        extracurricular_score = float(request.form['extracurricular_score'])
-        total_score = float(request.form['total_score'])
-        department = int(request.form['department'])
-        field = int(request.form['field'])
-        
-        # Create a DataFrame for the input
-        new_data = pd.DataFrame({
-            'cgpa': [cgpa],
-            'project_score': [project_score],
-            'internships': [internships],
-            'extracurricular_score': [extracurricular_score],
-            'total_score': [total_score],
-            'department': [department],
-            'field': [field],
-        })
-        
-        # Make prediction
-        prediction = model.predict(new_data)[0]
-        probability = model.predict_proba(new_data)[0]
-        
-        # Map prediction to outcome
-        outcome_map = {0: "Selected", 1: "Rejected", 2: "No Offer"}
-        result = outcome_map[prediction]
-        
+        with span('predict'):
+            key, row, cached = parse_form(request.form)
+            if cached is None:
+                # Make prediction (batched with concurrent requests)
+                cached = store_prediction(key, batcher.predict(row))
+            else:
+                count('cache_hits', 'predict')
+        result, probability = cached
+
         return render_template(
             'index.html',
             prediction=result,
-            probability=round(probability[prediction] * 100, 2)
+            probability=probability
         )
     except Exception as e:
         return render_template('index.html', error=str(e))
 
+# Route for batch predictions
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return jsonify(error="request body must be JSON"), 400
+
+    try:
+        X = loader.get_features().transform(payload)
+    except (ValueError, TypeError) as e:
+        return jsonify(error=str(e)), 400
+
+    labels, probabilities = score_matrix(X)
+    return Response(stream_predictions(labels, probabilities), mimetype='application/json')
+
+# Liveness check; never loads or calls the model
+@app.route('/healthz')
+def healthz():
+    return jsonify(status="ok", model_version=loader.version)
+
+# Prometheus scrape endpoint: stage latency histograms plus row, error and cache-hit counters
+@app.route('/metrics')
+def metrics():
+    return Response(instrumentation.REGISTRY.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+# Route for micro-batching metrics
+@app.route('/predict/batching')
+def batching_stats():
+    return jsonify(batcher.stats())
+
+# Route for prediction cache counters
+@app.route('/predict/cache')
+def cache_stats():
+    return jsonify(cache.stats())
+
 # Run the Flask app
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    loader.preload()
+    loader.report('boot')
+    app.run(debug=True)
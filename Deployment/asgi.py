@@ -0,0 +1,194 @@
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+from asgiref.wsgi import WsgiToAsgi
+from app import app, batcher, count, loader, parse_form, render_template, score_matrix, span, store_prediction, stream_predictions
+
+# Requests holding or waiting for the model at once; beyond this new ones get 429
+MAX_QUEUE_DEPTH = int(os.environ.get('MAX_QUEUE_DEPTH', 64))
+# Seconds a request may wait for its prediction before it gets 503
+REQUEST_TIMEOUT = float(os.environ.get('REQUEST_TIMEOUT_SECONDS', 5))
+# Threads running /predict/batch inference (single predictions go through the micro-batcher)
+INFERENCE_THREADS = int(os.environ.get('INFERENCE_THREADS', 4))
+MAX_BODY_BYTES = int(os.environ.get('MAX_BODY_BYTES', 64 * 1024 * 1024))
+
+executor = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix='inference')
+
+# Routes without model work (stats, static files) still go to Flask, in asgiref's thread
+flask_app = WsgiToAsgi(app)
+
+class QueueGate:
+    """Admit model work up to a fixed depth; a slot is freed when the work finishes, not when the client gives up."""
+
+    def __init__(self, max_depth):
+        self.max_depth = max_depth
+        self.depth = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def try_acquire(self):
+        if self.depth >= self.max_depth:
+            self.rejected += 1
+            return False
+        self.depth += 1
+        return True
+
+    def release(self):
+        self.depth -= 1
+
+    def stats(self):
+        return {'queue_depth': self.depth, 'max_queue_depth': self.max_depth,
+                'rejected': self.rejected, 'timed_out': self.timed_out}
+
+gate = QueueGate(MAX_QUEUE_DEPTH)
+
+async def read_body(receive):
+    """Read the whole request body; None if it exceeds MAX_BODY_BYTES."""
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        size += len(chunks[-1])
+        if size > MAX_BODY_BYTES:
+            return None
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+async def respond(send, status, body, content_type=b'application/json', headers=()):
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', content_type), (b'content-length', str(len(body)).encode()), *headers]})
+    await send({'type': 'http.response.body', 'body': body})
+
+async def respond_json(send, status, payload, headers=()):
+    await respond(send, status, json.dumps(payload).encode(), headers=headers)
+
+async def respond_html(send, status=200, headers=(), **context):
+    with app.app_context():
+        html = render_template('index.html', **context)
+    await respond(send, status, html.encode(), b'text/html; charset=utf-8', headers)
+
+async def off_loop(func, *args):
+    """Run func on an inference thread, in the caller's span context; model access (and a hot reload) can block."""
+    return await asyncio.get_running_loop().run_in_executor(executor, contextvars.copy_context().run, func, *args)
+
+async def run_gated(send, future, html=False):
+    """Wait for admitted model work; answers 503 and returns None if it takes longer than REQUEST_TIMEOUT."""
+    # Completion callbacks fire on worker threads; the gate is only touched on the event loop
+    loop = asyncio.get_running_loop()
+    future.add_done_callback(lambda _: loop.call_soon_threadsafe(gate.release))
+    try:
+        return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), REQUEST_TIMEOUT)
+    except asyncio.TimeoutError:
+        gate.timed_out += 1
+        headers = [(b'retry-after', b'1')]
+        if html:
+            await respond_html(send, 503, headers, error="Prediction timed out, please retry")
+        else:
+            await respond_json(send, 503, {'error': "prediction timed out"}, headers)
+        return None
+
+async def overloaded(send, html=False):
+    headers = [(b'retry-after', b'1')]
+    if html:
+        await respond_html(send, 429, headers, error="Too many requests queued, please retry")
+    else:
+        await respond_json(send, 429, {'error': "too many requests queued"}, headers)
+
+def batch_body(raw):
+    """Decode, score and serialize one /predict/batch request (runs on an inference thread)."""
+    try:
+        payload = json.loads(raw)
+    except ValueError:
+        return 400, json.dumps({'error': "request body must be JSON"}).encode()
+    try:
+        X = loader.get_features().transform(payload)
+    except (ValueError, TypeError) as e:
+        return 400, json.dumps({'error': str(e)}).encode()
+    labels, probabilities = score_matrix(X)
+    return 200, ''.join(stream_predictions(labels, probabilities)).encode()
+
+async def predict_form(receive, send):
+    """The HTML form route, with inference awaited on the micro-batcher instead of blocking a thread."""
+    body = await read_body(receive)
+    if body is None:
+        return await respond(send, 413, b'Request body too large', b'text/plain')
+    try:
+        with span('predict'):
+            key, row, cached = await off_loop(parse_form, dict(parse_qsl(body.decode(), keep_blank_values=True)))
+            if cached is None:
+                if not gate.try_acquire():
+                    count('rejected', 'predict')
+                    return await overloaded(send, html=True)
+                probability = await run_gated(send, batcher.submit(row), html=True)
+                if probability is None:
+                    count('timed_out', 'predict')
+                    return
+                cached = await off_loop(store_prediction, key, probability)
+            else:
+                count('cache_hits', 'predict')
+        result, probability = cached
+        await respond_html(send, prediction=result, probability=probability)
+    except Exception as e:
+        await respond_html(send, error=str(e))
+
+async def predict_batch(receive, send):
+    body = await read_body(receive)
+    if body is None:
+        return await respond_json(send, 413, {'error': "request body too large"})
+    if not gate.try_acquire():
+        return await overloaded(send)
+    result = await run_gated(send, executor.submit(batch_body, body))
+    if result is not None:
+        await respond(send, *result)
+
+async def lifespan(receive, send):
+    """Load the model off the event loop at startup; stop the inference threads at shutdown."""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await asyncio.get_running_loop().run_in_executor(executor, loader.preload)
+            loader.report('asgi')
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def application(scope, receive, send):
+    """ASGI entry point: native async routes for health and prediction, Flask for the rest."""
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    path, method = scope['path'], scope['method']
+    if path == '/healthz':
+        # Never touches the model, so it answers even while inference is saturated
+        return await respond_json(send, 200, {'status': "ok", 'model_version': loader.version, **gate.stats()})
+    if path == '/predict' and method == 'POST':
+        return await predict_form(receive, send)
+    if path == '/predict/batch' and method == 'POST':
+        return await predict_batch(receive, send)
+    if path == '/predict/backpressure':
+        return await respond_json(send, 200, gate.stats())
+    await flask_app(scope, receive, send)
+
+# Run with: python asgi.py, uvicorn asgi:application, or
+# gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:application
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the prediction API over ASGI.")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--keep-alive', type=int, default=30, help="seconds an idle keep-alive connection stays open")
+    args = parser.parse_args()
+
+    # h11 keeps connections alive and answers pipelined HTTP/1.1 requests in order
+    uvicorn.run('asgi:application', host=args.host, port=args.port, workers=args.workers,
+                http='h11', timeout_keep_alive=args.keep_alive, lifespan='on')
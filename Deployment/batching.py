@@ -0,0 +1,99 @@
+import threading
+import queue
+from collections import Counter
+from concurrent.futures import Future
+from time import perf_counter
+import numpy as np
+
+class MicroBatcher:
+    """Coalesce concurrent single-row predictions into one model call."""
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait=0.002):
+        """Score stacked rows with predict_fn, waiting at most max_wait seconds for a batch to fill."""
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+        # Metrics
+        self.batch_sizes = Counter()
+        self.batches = 0
+        self.rows = 0
+        self.total_queue_delay = 0.0
+        self.max_queue_delay = 0.0
+
+    def _ensure_worker(self):
+        """Start the scheduler thread on first use (after any fork)."""
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+                    self._worker.start()
+
+    def submit(self, row):
+        """Queue one feature row and return a Future for its result row."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((np.asarray(row, dtype=np.float64), future, perf_counter()))
+        return future
+
+    def predict(self, row, timeout=None):
+        """Score one feature row, blocking until its batch has run."""
+        return self.submit(row).result(timeout)
+
+    def _collect(self):
+        """Block for the first request, then gather more until the batch is full or the window closes."""
+        batch = [self._queue.get()]
+        deadline = perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        """Scheduler loop: run the model once per collected batch and fan results back out."""
+        while True:
+            batch = self._collect()
+            started = perf_counter()
+            rows, futures, enqueued = zip(*batch)
+
+            try:
+                results = self.predict_fn(np.vstack(rows))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+            else:
+                for i, future in enumerate(futures):
+                    future.set_result(results[i])
+
+            self._record(len(batch), [started - t for t in enqueued])
+
+    def _record(self, size, delays):
+        """Update batch size and queueing delay metrics."""
+        with self._lock:
+            self.batches += 1
+            self.rows += size
+            self.batch_sizes[size] += 1
+            self.total_queue_delay += sum(delays)
+            self.max_queue_delay = max(self.max_queue_delay, max(delays))
+
+    def stats(self):
+        """Return achieved batch sizes and queueing delay as a dict."""
+        with self._lock:
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'batches': self.batches,
+                'rows': self.rows,
+                'mean_batch_size': self.rows / self.batches if self.batches else 0.0,
+                'batch_size_counts': dict(sorted(self.batch_sizes.items())),
+                'mean_queue_delay_ms': self.total_queue_delay / self.rows * 1000 if self.rows else 0.0,
+                'max_queue_delay_ms': self.max_queue_delay * 1000,
+            }
@@ -0,0 +1,13 @@
+# Run with: gunicorn -c gunicorn.conf.py app:app
+workers = 4
+threads = 8
+bind = '0.0.0.0:8000'
+
+# Import app (and load the model) once in the master so workers share its pages
+preload_app = True
+raw_env = ['PRELOAD_MODEL=1']
+
+def post_worker_init(worker):
+    """Report per-worker RSS once the worker is ready."""
+    from app import loader
+    loader.report('worker')
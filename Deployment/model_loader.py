@@ -0,0 +1,117 @@
+import os
+import sys
+import threading
+from time import perf_counter, monotonic
+from tree_eval import CURRENT_FILE, CompiledModel
+
+# The feature transformer is shared with training
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data Processing'))
+from features import FeatureTransformer, unpack_artifact
+
+def current_rss_mb():
+    """Resident set size of this process in MB."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    # Fall back to peak RSS where /proc is unavailable (KB on Linux, bytes on macOS)
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+class ModelLoader:
+    """Load the placement model lazily, share its arrays via mmap and reload it when the file changes."""
+
+    def __init__(self, path='model_placement_prediction', check_interval=2.0):
+        """Watch path (or its compiled <path>.trees directory), checking for changes every check_interval seconds."""
+        self.path = path
+        self.check_interval = check_interval
+        self.version = 0
+        self.load_seconds = None
+        self._model = None
+        self._features = None
+        self._signature = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def compiled_path(self):
+        return f'{self.path}.trees'
+
+    def _source(self):
+        """Return the file whose modification marks a new model, and whether it is compiled."""
+        if os.path.isdir(self.compiled_path):
+            # tree_export.py replaces CURRENT once a new version is complete
+            pointer = os.path.join(self.compiled_path, CURRENT_FILE)
+            if os.path.exists(pointer):
+                return pointer, True
+            # Unversioned exports write meta.json last
+            return os.path.join(self.compiled_path, 'meta.json'), True
+        return self.path, False
+
+    def _signature_of(self, source):
+        stat = os.stat(source)
+        return (source, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _load(self):
+        """Deserialize the model and its feature spec, with numeric arrays memory-mapped read-only."""
+        source, compiled = self._source()
+        signature = self._signature_of(source)
+
+        start = perf_counter()
+        if compiled:
+            model = CompiledModel.load(self.compiled_path, mmap_mode='r')
+            spec = model.features
+        else:
+            import joblib
+            model, spec = unpack_artifact(joblib.load(self.path, mmap_mode='r'))
+        features = FeatureTransformer(spec)
+        self.load_seconds = perf_counter() - start
+
+        self._model = model
+        self._features = features
+        self._signature = signature
+        self.version += 1
+        self._next_check = monotonic() + self.check_interval
+        return model
+
+    def preload(self):
+        """Load eagerly, e.g. in the master process before workers fork."""
+        with self._lock:
+            if self._model is None:
+                self._load()
+        return self._model
+
+    def get(self):
+        """Return the current model, loading it on first use or reloading it if the file changed."""
+        model = self._model
+        if model is not None and monotonic() < self._next_check:
+            return model
+
+        with self._lock:
+            if self._model is None:
+                return self._load()
+            if monotonic() >= self._next_check:
+                self._next_check = monotonic() + self.check_interval
+                try:
+                    changed = self._signature_of(self._source()[0]) != self._signature
+                except OSError:
+                    # Keep serving the loaded model while a new one is being written
+                    changed = False
+                if changed:
+                    self._load()
+            return self._model
+
+    def get_features(self):
+        """Return the feature transformer saved with the current model."""
+        self.get()
+        return self._features
+
+    def report(self, label='worker'):
+        """Print load time and RSS for this process."""
+        load = f"{self.load_seconds * 1000:.1f} ms" if self.load_seconds is not None else "not loaded"
+        print(f"[{label} {os.getpid()}] model v{self.version} load: {load}, RSS: {current_rss_mb():.1f} MB")
@@ -0,0 +1,88 @@
+import threading
+from collections import OrderedDict
+from time import monotonic
+
+def normalize_features(cgpa, project_score, internships, extracurricular_score, department, field):
+    """Round form inputs to the precision the form collects so equal profiles share a key.
+
+    department and field are integer codes; total_score is derived from the rest, so it is not part of the key.
+    """
+    return (
+        round(cgpa, 2),
+        round(project_score, 1),
+        int(internships),
+        round(extracurricular_score, 1),
+        int(department),
+        int(field),
+    )
+
+class PredictionCache:
+    """Thread-safe LRU cache of predictions with an optional TTL, cleared when the model changes."""
+
+    def __init__(self, maxsize=4096, ttl=None):
+        """Keep at most maxsize entries, each for at most ttl seconds (None for no expiry)."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._model_version = None
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_version(self, model_version):
+        """Drop every entry computed by a previous model."""
+        if model_version != self._model_version:
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+            self._model_version = model_version
+
+    def get(self, key, model_version):
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            self._check_version(model_version)
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and monotonic() - entry[1] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, model_version):
+        """Store value for key, evicting the least recently used entry when full."""
+        with self._lock:
+            self._check_version(model_version)
+            self._entries[key] = (value, monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        """Return size and hit/miss/eviction counters as a dict."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'model_version': self._model_version,
+            }
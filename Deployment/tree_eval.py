@@ -0,0 +1,85 @@
+import json
+import os
+import numpy as np
+
+# Arrays written by tree_export.py, one .npy file each
+TREE_ARRAYS = ['feature', 'threshold', 'left', 'right', 'value', 'roots']
+
+# File in an export directory naming the version subdirectory that is live
+CURRENT_FILE = 'CURRENT'
+
+def resolve_export(path):
+    """Return the directory holding an export's live arrays (path itself for unversioned exports)."""
+    try:
+        with open(os.path.join(path, CURRENT_FILE)) as f:
+            return os.path.join(path, f.read().strip())
+    except FileNotFoundError:
+        return path
+
+class CompiledModel:
+    """Gradient boosting classifier scored from flattened tree arrays, without sklearn."""
+
+    def __init__(self, arrays, meta):
+        """Wrap the flattened node arrays and the model metadata written at export time."""
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+
+        self.classes_ = np.array(meta['classes'])
+        self.feature_names = meta['feature_names']
+        self.learning_rate = meta['learning_rate']
+        self.init_raw = np.array(meta['init_raw'], dtype=np.float64)
+        self.n_stages = meta['n_stages']
+        self.n_tree_outputs = meta['n_tree_outputs']
+        self.max_depth = meta['max_depth']
+        # Feature spec saved with the model (absent in exports that predate it)
+        self.features = meta.get('features')
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        """Load a model directory written by tree_export.export_model."""
+        path = resolve_export(path)
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        # With mmap_mode='r' the node arrays are shared page-cache mappings across workers
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode) for name in TREE_ARRAYS}
+        return cls(arrays, meta)
+
+    def apply(self, X):
+        """Return the leaf index reached in every tree, shape (n_samples, n_trees)."""
+        # sklearn compares float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots))).copy()
+
+        # Leaves loop back onto themselves, so a fixed number of steps reaches every leaf
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def decision_function(self, X):
+        """Raw boosted scores, one column per tree output."""
+        leaves = self.value[self.apply(X)]
+        stages = leaves.reshape(leaves.shape[0], self.n_stages, self.n_tree_outputs)
+        return self.init_raw + self.learning_rate * stages.sum(axis=1)
+
+    def predict_proba(self, X):
+        """Class probabilities for a batch of feature rows."""
+        raw = self.decision_function(X)
+        if self.n_tree_outputs == 1:
+            # Binary log-loss: one logit for the positive class
+            positive = 1.0 / (1.0 + np.exp(-raw[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+
+        # Multinomial log-loss: softmax over per-class scores
+        raw = raw - raw.max(axis=1, keepdims=True)
+        exp = np.exp(raw)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        """Most probable class for each feature row."""
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
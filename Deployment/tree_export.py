@@ -0,0 +1,175 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import sqlite3
+import sys
+from time import perf_counter
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from tree_eval import CURRENT_FILE, TREE_ARRAYS, CompiledModel
+
+# Feature codes are shared with training
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data Processing'))
+from features import DEPARTMENT_CODES, FIELD_CODES, OUTCOME_CODES, default_spec, unpack_artifact
+
+def init_raw_predictions(model):
+    """Constant raw score the boosting stages start from (the class prior)."""
+    n_outputs = model.estimators_.shape[1]
+    if isinstance(model.init_, str) and model.init_ == 'zero':
+        return np.zeros(n_outputs)
+    if not hasattr(model.init_, 'class_prior_'):
+        raise ValueError("only the default prior init estimator can be compiled")
+
+    prior = np.clip(model.init_.class_prior_, np.finfo(np.float64).eps, 1 - np.finfo(np.float64).eps)
+    if n_outputs == 1:
+        return np.array([np.log(prior[1] / prior[0])])
+    return np.log(prior)
+
+def flatten_trees(model):
+    """Concatenate every regression tree into contiguous node arrays."""
+    trees = [estimator.tree_ for estimator in model.estimators_.ravel()]
+    feature, threshold, left, right, value, roots = [], [], [], [], [], []
+    offset = 0
+
+    for tree in trees:
+        node_ids = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+
+        # Leaves point at themselves and always compare true, so traversal can run a fixed depth
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+        left.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+        right.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+        value.append(tree.value[:, 0, 0])
+        roots.append(offset)
+        offset += tree.node_count
+
+    return {
+        'feature': np.concatenate(feature).astype(np.intp),
+        'threshold': np.concatenate(threshold).astype(np.float64),
+        'left': np.concatenate(left).astype(np.intp),
+        'right': np.concatenate(right).astype(np.intp),
+        'value': np.concatenate(value).astype(np.float64),
+        'roots': np.array(roots, dtype=np.intp),
+    }, max(tree.max_depth for tree in trees)
+
+def export_versions(path):
+    """Version numbers of the exports under path, oldest first."""
+    names = os.listdir(path) if os.path.isdir(path) else []
+    return sorted(int(m.group(1)) for m in map(re.compile(r'v(\d+)$').match, names)
+                  if m and os.path.isdir(os.path.join(path, m.group(0))))
+
+def prune_exports(path, keep=2):
+    """Remove all but the newest keep versions, and the arrays of an unversioned export.
+
+    Best effort: files still mapped by a worker can't be removed on Windows, so they go on a later export.
+    """
+    for version in export_versions(path)[:-keep]:
+        shutil.rmtree(os.path.join(path, f'v{version}'), ignore_errors=True)
+    for name in [f'{name}.npy' for name in TREE_ARRAYS] + ['meta.json']:
+        try:
+            os.remove(os.path.join(path, name))
+        except OSError:
+            pass
+
+def export_model(model, path, features=None):
+    """Write a fitted GradientBoostingClassifier as a directory of flat arrays.
+
+    features is the model's feature spec (features.default_spec() if not given), kept in meta.json.
+    Each export is written to a new path/v<N> directory and then made live by atomically replacing
+    path/CURRENT, so workers that memory-mapped an earlier version never read rewritten arrays.
+    """
+    if getattr(model, 'loss', 'log_loss') not in ('log_loss', 'deviance'):
+        raise ValueError(f"unsupported loss: {model.loss}")
+
+    arrays, max_depth = flatten_trees(model)
+    meta = {
+        'classes': model.classes_.tolist(),
+        'feature_names': list(getattr(model, 'feature_names_in_', [])),
+        'learning_rate': model.learning_rate,
+        'init_raw': init_raw_predictions(model).tolist(),
+        'n_stages': model.estimators_.shape[0],
+        'n_tree_outputs': model.estimators_.shape[1],
+        'max_depth': int(max_depth),
+        'features': features or default_spec(),
+    }
+
+    os.makedirs(path, exist_ok=True)
+    versions = export_versions(path)
+    version = f"v{versions[-1] + 1 if versions else 1}"
+    staging = os.path.join(path, f'.{version}.tmp')
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    for name, array in arrays.items():
+        np.save(os.path.join(staging, f'{name}.npy'), np.ascontiguousarray(array))
+    with open(os.path.join(staging, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(staging, os.path.join(path, version))
+
+    # Switch readers to the new version in one rename
+    pointer = os.path.join(path, CURRENT_FILE)
+    with open(pointer + '.tmp', 'w') as f:
+        f.write(version)
+    os.replace(pointer + '.tmp', pointer)
+    prune_exports(path)
+
+def load_test_split(db_path):
+    """Rebuild the notebook's 80/20 test split from the mapped database."""
+    conn = sqlite3.connect(db_path)
+    df = pd.read_sql_query("SELECT * from student_institution_mappings;", conn)
+    conn.close()
+
+    df = df.drop(['id', 'student_name', 'institution_name', 'institution_rank'], axis=1)
+    df['department'] = df['department'].map(DEPARTMENT_CODES)
+    df['field'] = df['field'].map(FIELD_CODES)
+    df['outcome'] = df['outcome'].map(OUTCOME_CODES)
+
+    X = df.drop('outcome', axis=1)
+    y = df['outcome']
+    _, X_test, _, _ = train_test_split(X, y, test_size=0.20, random_state=42)
+    return X_test
+
+def check_parity(model, compiled, X, atol=1e-9):
+    """Compare compiled probabilities and labels with the sklearn model."""
+    expected = model.predict_proba(X)
+    actual = compiled.predict_proba(np.asarray(X))
+    max_diff = float(np.abs(expected - actual).max())
+    labels_match = bool((model.predict(X) == compiled.predict(np.asarray(X))).all())
+    return max_diff <= atol and labels_match, max_diff, labels_match
+
+def single_row_latency(predict_proba, row, repeat=1000):
+    """Mean seconds per single-row predict_proba call."""
+    start = perf_counter()
+    for _ in range(repeat):
+        predict_proba(row)
+    return (perf_counter() - start) / repeat
+
+# Main execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the placement model into flat tree arrays.")
+    parser.add_argument('model', nargs='?', default='model_placement_prediction')
+    parser.add_argument('--out', default=None, help="output directory (default: <model>.trees)")
+    parser.add_argument('--check', metavar='DB', help="mapped_data.db to run the parity check against")
+    args = parser.parse_args()
+
+    out = args.out or f"{args.model}.trees"
+    model, features = unpack_artifact(joblib.load(args.model))
+    export_model(model, out, features)
+    print(f"Compiled {model.estimators_.size} trees to {out}")
+
+    if args.check:
+        compiled = CompiledModel.load(out)
+        X_test = load_test_split(args.check)
+        ok, max_diff, labels_match = check_parity(model, compiled, X_test)
+        print(f"Parity on {len(X_test)} test rows: max |dp| = {max_diff:.2e}, labels match: {labels_match}")
+
+        row = X_test.iloc[:1]
+        print(f"sklearn single-row latency:  {single_row_latency(model.predict_proba, row) * 1e6:.1f} us")
+        print(f"compiled single-row latency: {single_row_latency(compiled.predict_proba, row.to_numpy()) * 1e6:.1f} us")
+
+        if not ok:
+            sys.exit(1)
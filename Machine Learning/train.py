@@ -0,0 +1,182 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+from datetime import datetime, timezone
+from itertools import product
+from time import perf_counter
+import joblib
+import numpy as np
+from joblib import Memory, Parallel, delayed
+from sklearn.base import clone
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.svm import SVC
+from sklearn.tree import DecisionTreeClassifier
+
+# Shared dataset loaders live with the processing scripts
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'Data Processing'))
+from dataset import load_feature_matrix, load_feature_matrix_sqlite
+from features import FeatureTransformer, unpack_artifact
+
+# Candidate models and their hyperparameter grids (the notebook's six, plus histogram GB).
+# Serving reports class probabilities, so every candidate must support predict_proba.
+MODELS = {
+    'lr': (LogisticRegression(max_iter=1000), {'C': [0.1, 1.0, 10.0]}),
+    'svc': (CalibratedClassifierCV(SVC(), ensemble=False), {'estimator__C': [0.5, 1.0, 2.0]}),
+    'knn': (KNeighborsClassifier(), {'n_neighbors': [5, 15, 31]}),
+    'dt': (DecisionTreeClassifier(random_state=0), {'max_depth': [4, 8, None]}),
+    'rf': (RandomForestClassifier(random_state=0), {'n_estimators': [100, 300], 'max_depth': [8, None]}),
+    'gb': (GradientBoostingClassifier(random_state=0), {'n_estimators': [100, 200], 'max_depth': [2, 3]}),
+    'hgb': (HistGradientBoostingClassifier(random_state=0), {'learning_rate': [0.05, 0.1], 'max_leaf_nodes': [15, 31]}),
+}
+
+# Above this many rows only histogram GB is searched unless --models asks for more: kernel and
+# neighbour models scale poorly, and the exact GB/RF grids take far longer to fit
+LARGE_N = 100_000
+
+def default_models(n_rows):
+    """Models compared when --models isn't given."""
+    return list(MODELS) if n_rows <= LARGE_N else ['hgb']
+
+def load_data(source):
+    """Load (X, y) from an exported Parquet/Arrow dataset or from mapped_data.db."""
+    if source.endswith('.db'):
+        return load_feature_matrix_sqlite(source)
+    return load_feature_matrix(source)
+
+def data_fingerprint(X, y):
+    """Content hash of the training data, used for cache keys and artifact versions."""
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(X).tobytes())
+    digest.update(np.ascontiguousarray(y).tobytes())
+    return digest.hexdigest()
+
+def param_grid(grid):
+    """Expand a {name: values} grid into a list of parameter dicts."""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in product(*(grid[n] for n in names))]
+
+def fit_fold(model_name, params, fold, n_splits, seed, data_key, X, y):
+    """Fit one model/params on one CV fold; returns (accuracy, fit seconds).
+
+    Cached on (model_name, params, fold, n_splits, seed, data_key), so reruns only fit what changed.
+    """
+    train, test = list(StratifiedKFold(n_splits, shuffle=True, random_state=seed).split(X, y))[fold]
+    estimator = clone(MODELS[model_name][0]).set_params(**params)
+    start = perf_counter()
+    estimator.fit(X[train], y[train])
+    seconds = perf_counter() - start
+    return accuracy_score(y[test], estimator.predict(X[test])), seconds
+
+def compare_models(X, y, models, n_splits=5, seed=42, n_jobs=-1, cache_dir='.train_cache'):
+    """Cross-validate every model and parameter combination in parallel; returns per-model results."""
+    data_key = data_fingerprint(X, y)
+    cached_fit = Memory(cache_dir, verbose=0).cache(fit_fold, ignore=['X', 'y'])
+
+    tasks = [(name, params, fold) for name in models
+             for params in param_grid(MODELS[name][1]) for fold in range(n_splits)]
+    scores = Parallel(n_jobs=n_jobs)(
+        delayed(cached_fit)(name, params, fold, n_splits, seed, data_key, X, y) for name, params, fold in tasks)
+
+    # Group fold scores back by (model, params)
+    folds = {}
+    for (name, params, _), (accuracy, seconds) in zip(tasks, scores):
+        entry = folds.setdefault((name, json.dumps(params, sort_keys=True)), {'accuracy': [], 'fit_seconds': 0.0})
+        entry['accuracy'].append(accuracy)
+        entry['fit_seconds'] += seconds
+
+    results = {}
+    for (name, params), entry in folds.items():
+        mean = float(np.mean(entry['accuracy']))
+        if name not in results or mean > results[name]['cv_accuracy']:
+            results[name] = {
+                'params': json.loads(params),
+                'cv_accuracy': mean,
+                'cv_std': float(np.std(entry['accuracy'])),
+                'fit_seconds': entry['fit_seconds'],
+            }
+    return results, data_key
+
+def publish(artifact, target):
+    """Copy the artifact to where app.py loads it, keeping its compiled trees in sync."""
+    model, features = unpack_artifact(joblib.load(artifact))
+    if not hasattr(model, 'predict_proba'):
+        raise ValueError(f"{type(model).__name__} has no predict_proba, which serving needs")
+
+    shutil.copyfile(artifact, target + '.tmp')
+    os.replace(target + '.tmp', target)
+
+    # app.py prefers <target>.trees, so refresh it for GradientBoosting and drop it otherwise
+    trees = f'{target}.trees'
+    if isinstance(model, GradientBoostingClassifier):
+        sys.path.insert(0, os.path.join(ROOT, 'Deployment'))
+        from tree_export import export_model
+        export_model(model, trees, features)
+    elif os.path.isdir(trees):
+        shutil.rmtree(trees)
+
+# Main execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train and select the placement model.")
+    parser.add_argument('--data', default='mapped_data.db', help="mapped_data.db or an exported dataset directory")
+    parser.add_argument('--models', nargs='+', choices=list(MODELS))
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--jobs', type=int, default=-1)
+    parser.add_argument('--cache-dir', default='.train_cache')
+    parser.add_argument('--artifacts', default='artifacts')
+    parser.add_argument('--publish', metavar='PATH', help="also install the model here (e.g. model_placement_prediction)")
+    args = parser.parse_args()
+
+    start = perf_counter()
+    X, y = load_data(args.data)
+    load_seconds = perf_counter() - start
+    print(f"Loaded {len(y)} rows in {load_seconds:.2f}s")
+
+    models = args.models or default_models(len(y))
+    start = perf_counter()
+    results, data_key = compare_models(X, y, models, args.folds, args.seed, args.jobs, args.cache_dir)
+    search_seconds = perf_counter() - start
+
+    for name, result in sorted(results.items(), key=lambda item: -item[1]['cv_accuracy']):
+        print(f"{name:>4}: {result['cv_accuracy'] * 100:.2f}% (+/- {result['cv_std'] * 100:.2f}) {result['params']}")
+
+    # Refit the best model on all rows
+    best = max(results, key=lambda name: results[name]['cv_accuracy'])
+    start = perf_counter()
+    model = clone(MODELS[best][0]).set_params(**results[best]['params']).fit(X, y)
+    refit_seconds = perf_counter() - start
+
+    # Versioned artifact, saved with the feature spec serving must apply, plus its metrics and timing report
+    version = f"{datetime.now(timezone.utc):%Y%m%d-%H%M%S}-{data_key[:8]}"
+    features = FeatureTransformer().to_dict()
+    os.makedirs(args.artifacts, exist_ok=True)
+    artifact = os.path.join(args.artifacts, f"model_placement_prediction-{version}")
+    joblib.dump({'model': model, 'features': features, 'version': version}, artifact)
+
+    report = {
+        'version': version,
+        'artifact': artifact,
+        'data': args.data,
+        'data_sha256': data_key,
+        'rows': int(len(y)),
+        'best_model': best,
+        'features': features,
+        'models': results,
+        'timing': {'load_seconds': load_seconds, 'search_seconds': search_seconds, 'refit_seconds': refit_seconds},
+    }
+    with open(f"{artifact}.json", 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Best model {best}; saved {artifact}")
+
+    if args.publish:
+        publish(artifact, args.publish)
+        print(f"Published to {args.publish}")
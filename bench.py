@@ -0,0 +1,314 @@
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+from multiprocessing import get_context
+from time import perf_counter
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+for directory in ('Data Acquisition', 'Data Processing', 'Deployment'):
+    sys.path.insert(0, os.path.join(ROOT, directory))
+
+# Student counts to benchmark; anything from 10**3 to 10**7 via --sizes
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+# Caps for cases that would take far too long at the largest sizes
+ROW_BY_ROW_MAX = 100_000     # generate_students inserts one row per execute()
+PARSE_MAX_ROWS = 100_000     # NIRF rows parsed (a fixture page of FIXTURE_ROWS, parsed repeatedly)
+PREDICT_MAX_REQUESTS = 2_000
+PREDICT_BATCH_MAX_ROWS = 100_000
+
+FIXTURE_ROWS = 200
+INSTITUTIONS = 200
+NAMES = [f"Student {i}" for i in range(500)]
+
+class BenchSkipped(Exception):
+    """A case that can't run at this size or in this environment; reported as skipped."""
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB."""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def students_db(n):
+    return f"students_{n}.db"
+
+def ensure_students(n):
+    """Generate the n-student database once per run (untimed setup for later cases)."""
+    from student import StudentDatabase
+    if os.path.exists(students_db(n)):
+        return
+    db = StudentDatabase(students_db(n))
+    db.generate_students_bulk(n, NAMES, seed=0)
+    db.close_connection()
+
+def ensure_nirf():
+    """A fixture nirf_rankings.db, where Mapping.fetch_institutions looks for it."""
+    if os.path.exists("nirf_rankings.db"):
+        return
+    conn = sqlite3.connect("nirf_rankings.db")
+    conn.execute("""
+    CREATE TABLE institutions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, rank TEXT, institution_name TEXT, city TEXT, state TEXT,
+        score TEXT, year INTEGER, category TEXT
+    )""")
+    conn.executemany("INSERT INTO institutions (rank, institution_name, city, state, score, year, category) "
+                     "VALUES (?, ?, ?, ?, ?, 2024, 'Engineering');",
+                     [(str(r), f"Institute {r}", "City", "State", f"{90 - r / 10:.2f}") for r in range(1, INSTITUTIONS + 1)])
+    conn.commit()
+    conn.close()
+
+def fixture_page(rows=FIXTURE_ROWS):
+    """A synthetic NIRF ranking page with the #tbl_overall layout the parsers expect."""
+    body = "".join(
+        f"<tr><td>IR-E-{r}</td><td>Institute {r}More Details<div>popup</div></td><td>x</td><td>x</td><td>x</td>"
+        f"<td>x</td><td>x</td><td>City {r % 20}</td><td>State</td><td>{90 - r / 10:.2f}</td><td>{r}</td></tr>"
+        for r in range(1, rows + 1))
+    return f"<html><body><table id='tbl_overall'><tr><th>Header</th></tr>{body}</table></body></html>"
+
+def ensure_model():
+    """A tiny model bundle for the /predict cases, trained on synthetic features."""
+    path = os.path.abspath("model_bench")
+    if os.path.exists(path):
+        return path
+    import joblib
+    from sklearn.ensemble import GradientBoostingClassifier
+    from features import FeatureTransformer
+
+    features = FeatureTransformer()
+    rng = np.random.default_rng(0)
+    n = 2000
+    X = features.transform({
+        'cgpa': rng.uniform(6, 10, n), 'project_score': rng.uniform(50, 100, n),
+        'internships': rng.integers(0, 4, n), 'extracurricular_score': rng.uniform(50, 100, n),
+        'department': rng.integers(0, 5, n)})
+    y = rng.integers(0, 3, n)
+    model = GradientBoostingClassifier(n_estimators=20, random_state=0).fit(X, y)
+    joblib.dump({'model': model, 'features': features.to_dict(), 'version': 'bench'}, path)
+    return path
+
+def random_profiles(rng, n):
+    return {
+        'cgpa': np.round(rng.uniform(6, 10, n), 2).tolist(),
+        'project_score': np.round(rng.uniform(50, 100, n), 1).tolist(),
+        'internships': rng.integers(0, 4, n).tolist(),
+        'extracurricular_score': np.round(rng.uniform(50, 100, n), 1).tolist(),
+        'department': rng.choice(["Computer Science", "Mechanical", "Electrical", "Civil", "Electronics"], n).tolist(),
+    }
+
+# Benchmark cases: each does its setup, then returns (rows processed, timed seconds, extra metrics)
+
+def bench_generate(n):
+    """StudentDatabase.generate_students, the original row-at-a-time generator."""
+    if n > ROW_BY_ROW_MAX:
+        raise BenchSkipped(f"row-by-row generation is capped at {ROW_BY_ROW_MAX} students")
+    from student import StudentDatabase
+    db = StudentDatabase(f"row_by_row_{n}.db")
+    db.clear_table()
+    names = (NAMES * (n // len(NAMES) + 1))[:n]
+    start = perf_counter()
+    db.generate_students(names)
+    seconds = perf_counter() - start
+    db.close_connection()
+    return n, seconds, {}
+
+def bench_generate_bulk(n):
+    """StudentDatabase.generate_students_bulk, the vectorized generator."""
+    from student import StudentDatabase
+    if os.path.exists(students_db(n)):
+        os.remove(students_db(n))
+    db = StudentDatabase(students_db(n))
+    start = perf_counter()
+    db.generate_students_bulk(n, NAMES, seed=0)
+    seconds = perf_counter() - start
+    db.close_connection()
+    return n, seconds, {}
+
+def bench_fetch(n):
+    """Mapping.fetch_students: every student, in total score order."""
+    from Mapping import fetch_students
+    ensure_students(n)
+    start = perf_counter()
+    students = fetch_students(students_db(n))
+    return len(students), perf_counter() - start, {}
+
+def bench_map(n):
+    """Mapping.map_students_to_institutions over the fixture institutions."""
+    from Mapping import fetch_institutions, fetch_students, map_students_to_institutions
+    ensure_students(n)
+    ensure_nirf()
+    students, institutions = fetch_students(students_db(n)), fetch_institutions()
+    start = perf_counter()
+    mappings = map_students_to_institutions(students, institutions)
+    return len(mappings), perf_counter() - start, {}
+
+def bench_save(n):
+    """Mapping.save_mappings_to_db, including the table swap and index build."""
+    from Mapping import fetch_institutions, fetch_students, map_students_to_institutions, save_mappings_to_db
+    ensure_students(n)
+    ensure_nirf()
+    mappings = map_students_to_institutions(fetch_students(students_db(n)), fetch_institutions())
+    start = perf_counter()
+    stats = save_mappings_to_db(mappings, f"mapped_{n}.db")
+    return stats['rows'], perf_counter() - start, {}
+
+def bench_parse(backend, n):
+    """nirf_parser on a fixture page, parsed until min(n, PARSE_MAX_ROWS) rows are produced."""
+    from nirf_parser import PARSERS
+    parse, available = PARSERS[backend]
+    if not available():
+        raise BenchSkipped(f"{backend} is not installed")
+    page = fixture_page().encode()
+    repeats = max(1, min(n, PARSE_MAX_ROWS) // FIXTURE_ROWS)
+    rows = 0
+    start = perf_counter()
+    for _ in range(repeats):
+        rows += len(parse(page))
+    return rows, perf_counter() - start, {}
+
+def bench_predict(n):
+    """Single-student /predict requests through Flask's test client: throughput and latency percentiles."""
+    os.environ['MODEL_PATH'] = ensure_model()
+    from app import app
+    client = app.test_client()
+    requests = min(n, PREDICT_MAX_REQUESTS)
+    profiles = random_profiles(np.random.default_rng(1), requests)
+    forms = [{name: str(values[i]) for name, values in profiles.items()} for i in range(requests)]
+    client.post('/predict', data=forms[0])  # Load the model outside the timing
+
+    latencies = np.empty(requests)
+    start = perf_counter()
+    for i, form in enumerate(forms):
+        t = perf_counter()
+        response = client.post('/predict', data=form)
+        latencies[i] = perf_counter() - t
+        if response.status_code != 200 or b'Error' in response.data:
+            raise RuntimeError(f"/predict failed: {response.data[:200]!r}")
+    seconds = perf_counter() - start
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return requests, seconds, {'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99}
+
+def bench_predict_batch(n):
+    """One columnar /predict/batch request of min(n, PREDICT_BATCH_MAX_ROWS) students."""
+    os.environ['MODEL_PATH'] = ensure_model()
+    from app import app
+    client = app.test_client()
+    rows = min(n, PREDICT_BATCH_MAX_ROWS)
+    payload = random_profiles(np.random.default_rng(2), rows)
+    client.post('/predict/batch', json=random_profiles(np.random.default_rng(3), 1))  # Load the model
+    start = perf_counter()
+    response = client.post('/predict/batch', json=payload)
+    body = response.get_data()
+    seconds = perf_counter() - start
+    if response.status_code != 200:
+        raise RuntimeError(f"/predict/batch failed: {body[:200]!r}")
+    return rows, seconds, {}
+
+CASES = {
+    'generate': bench_generate,
+    'generate_bulk': bench_generate_bulk,
+    'fetch': bench_fetch,
+    'map': bench_map,
+    'save': bench_save,
+    'parse_bs4': partial(bench_parse, 'bs4'),
+    'parse_lxml': partial(bench_parse, 'lxml'),
+    'parse_selectolax': partial(bench_parse, 'selectolax'),
+    'predict': bench_predict,
+    'predict_batch': bench_predict_batch,
+}
+
+def run_case(name, n, workdir):
+    """Run one case in this (fresh) process and measure it."""
+    os.chdir(workdir)
+    baseline_rss = peak_rss_mb()
+    try:
+        rows, seconds, extra = CASES[name](n)
+    except (ImportError, BenchSkipped) as e:
+        return {'case': name, 'n': n, 'skipped': str(e)}
+    return {
+        'case': name,
+        'n': n,
+        'rows': rows,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds else None,
+        'peak_rss_mb': peak_rss_mb(),
+        'rss_growth_mb': peak_rss_mb() - baseline_rss,
+        **extra,
+    }
+
+def run_benchmarks(cases, sizes, workdir):
+    """Run every case at every size, each in its own process so peak RSS is per case."""
+    results = []
+    for n in sizes:
+        for name in cases:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+                result = pool.submit(run_case, name, n, workdir).result()
+            results.append(result)
+            if 'skipped' in result:
+                print(f"{name:>16} n={n:<9} skipped: {result['skipped']}")
+            else:
+                extra = ''.join(f", {k} {result[k]:.2f}" for k in ('p50_ms', 'p95_ms', 'p99_ms') if k in result)
+                print(f"{name:>16} n={n:<9} {result['seconds']:8.3f}s {result['rows_per_second']:14,.0f} rows/s "
+                      f"peak RSS {result['peak_rss_mb']:8.1f} MB{extra}")
+    return results
+
+def compare(results, baseline, tolerance=0.10):
+    """Flag cases slower (rows/s) or hungrier (peak RSS) than the baseline by more than tolerance."""
+    previous = {(r['case'], r['n']): r for r in baseline['results'] if 'skipped' not in r}
+    regressions = []
+    for result in results:
+        before = previous.get((result['case'], result['n']))
+        if 'skipped' in result or before is None:
+            continue
+        if result['rows_per_second'] < before['rows_per_second'] * (1 - tolerance):
+            regressions.append((result['case'], result['n'], 'rows_per_second',
+                                before['rows_per_second'], result['rows_per_second']))
+        if result['peak_rss_mb'] > before['peak_rss_mb'] * (1 + tolerance):
+            regressions.append((result['case'], result['n'], 'peak_rss_mb', before['peak_rss_mb'], result['peak_rss_mb']))
+    return regressions
+
+# Main execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage offline.")
+    parser.add_argument('--sizes', nargs='+', type=lambda s: int(float(s)), default=DEFAULT_SIZES,
+                        help="student counts, e.g. 1e3 1e5 1e7")
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--workdir', help="where fixture databases are written (default: a temporary directory)")
+    parser.add_argument('--out', default='bench_results.json')
+    parser.add_argument('--baseline', help="earlier results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="allowed relative slowdown/growth")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = os.path.abspath(args.workdir or tmp)
+        os.makedirs(workdir, exist_ok=True)
+        results = run_benchmarks(args.cases, args.sizes, workdir)
+
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'sizes': args.sizes,
+        'results': results,
+    }
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for case, n, metric, before, after in regressions:
+            print(f"REGRESSION {case} n={n}: {metric} {before:,.2f} -> {after:,.2f}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline")
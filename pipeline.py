@@ -0,0 +1,228 @@
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from time import perf_counter, time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Directories the scripts import each other from (each adds the others it needs to sys.path)
+SOURCE_DIRS = ['Data Acquisition', 'Data Processing', 'Deployment', 'Machine Learning']
+
+# Pipeline stages: the script to run, its arguments, and the files it reads and writes in the
+# working directory. A stage runs once every stage producing its inputs has finished. Scrape stages
+# have no inputs to change, so they also re-run once their last run is older than max_age seconds.
+STAGES = {
+    'nirf': {
+        'script': os.path.join('Data Acquisition', 'Scrape_NIRF.py'),
+        'args': [],
+        'inputs': [],
+        'outputs': ['nirf_rankings.db'],
+        'max_age': 24 * 3600,  # Conditional GETs make a daily re-check cheap
+    },
+    'jobs': {
+        'script': os.path.join('Data Acquisition', 'Scrape_jobs.py'),
+        'args': ['--incremental'],
+        'inputs': [],
+        'outputs': ['jobs.db'],
+        'max_age': 6 * 3600,
+    },
+    'students': {
+        'script': os.path.join('Data Acquisition', 'student.py'),
+        'args': [],
+        'inputs': [],
+        'outputs': ['students_college.db'],
+    },
+    'mapping': {
+        'script': os.path.join('Data Processing', 'Mapping.py'),
+        'args': ['--quiet'],
+        'inputs': ['students_college.db', 'nirf_rankings.db'],
+        'outputs': ['mapped_data.db'],
+    },
+    'linking': {
+        'script': os.path.join('Data Processing', 'linking.py'),
+        'args': [],
+        'inputs': ['jobs.db', 'nirf_rankings.db', 'mapped_data.db'],
+        'outputs': ['linked.db'],
+    },
+    'train': {
+        'script': os.path.join('Machine Learning', 'train.py'),
+        'args': ['--data', 'mapped_data.db', '--publish', 'model_placement_prediction'],
+        'inputs': ['mapped_data.db'],
+        'outputs': ['model_placement_prediction'],
+    },
+}
+
+CACHE_FILE = '.pipeline_cache.json'
+
+def file_digest(path, block_size=1 << 20):
+    """SHA-256 of a file's contents, or None if it doesn't exist."""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def local_imports(path):
+    """Top-level names of every module a source file imports, including imports inside functions."""
+    with open(path, 'rb') as f:
+        tree = ast.parse(f.read(), path)
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names.add(node.module.split('.')[0])
+    return names
+
+def stage_sources(script):
+    """The stage script plus every repository module it imports, directly or through other modules.
+
+    A module is looked up next to the importing file first, then in the other source directories.
+    """
+    script = os.path.join(ROOT, script)
+    sources, pending = set(), [script]
+    while pending:
+        path = pending.pop()
+        if path in sources:
+            continue
+        sources.add(path)
+        directories = [os.path.dirname(path)] + [os.path.join(ROOT, d) for d in SOURCE_DIRS]
+        for name in local_imports(path):
+            for directory in directories:
+                candidate = os.path.join(directory, f'{name}.py')
+                if os.path.exists(candidate):
+                    pending.append(candidate)
+                    break
+    return sorted(sources)
+
+def fingerprint(stage, workdir):
+    """Hash a stage's code (its script and the repository modules it imports), arguments and input files."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([stage['script'], stage['args']]).encode())
+    for source in stage_sources(stage['script']):
+        digest.update(os.path.relpath(source, ROOT).encode())
+        digest.update(str(file_digest(source)).encode())
+    for name in stage['inputs']:
+        digest.update(name.encode())
+        digest.update(str(file_digest(os.path.join(workdir, name))).encode())
+    return digest.hexdigest()
+
+def outputs_fingerprint(stage, workdir):
+    """Hash a stage's output files, to detect outputs changed outside the pipeline."""
+    return {name: file_digest(os.path.join(workdir, name)) for name in stage['outputs']}
+
+def dependencies(stages):
+    """Map each stage to the stages whose outputs it reads."""
+    producers = {output: name for name, stage in stages.items() for output in stage['outputs']}
+    return {name: {producers[i] for i in stage['inputs'] if i in producers} for name, stage in stages.items()}
+
+def run_stage(name, stage, workdir, metrics=False):
+    """Run one stage's script with the working directory holding the pipeline databases.
+
+    With metrics, the stage dumps its instrumentation to <stage>.prom in the working directory.
+    """
+    start = perf_counter()
+    log_path = os.path.join(workdir, f'{name}.log')
+    env = {**os.environ, 'METRICS_FILE': os.path.join(workdir, f'{name}.prom')} if metrics else None
+    with open(log_path, 'w') as log:
+        result = subprocess.run([sys.executable, os.path.join(ROOT, stage['script']), *stage['args']],
+                                cwd=workdir, stdout=log, stderr=subprocess.STDOUT, env=env)
+    return result.returncode, perf_counter() - start
+
+def run_pipeline(stages=STAGES, workdir='.', force=(), max_workers=3, metrics=False):
+    """Run stages in dependency order, in parallel where independent, skipping unchanged ones.
+
+    Returns {stage: {'status', 'seconds'}}.
+    """
+    workdir = os.path.abspath(workdir)
+    os.makedirs(workdir, exist_ok=True)
+    cache_path = os.path.join(workdir, CACHE_FILE)
+    cache = {}
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cache = json.load(f)
+
+    deps = dependencies(stages)
+    report = {}
+    pending = set(stages)
+    running = {}
+
+    def save_cache():
+        with open(cache_path, 'w') as f:
+            json.dump(cache, f, indent=2)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            # Start (or skip) every stage whose upstream stages are done
+            for name in sorted(pending):
+                if deps[name] & (pending | set(running.values())):
+                    continue
+                if any(report[d]['status'] in ('failed', 'blocked') for d in deps[name]):
+                    pending.discard(name)
+                    report[name] = {'status': 'blocked', 'seconds': 0.0}
+                    continue
+
+                stage = stages[name]
+                key = fingerprint(stage, workdir)
+                cached = cache.get(name, {})
+                fresh = 'max_age' not in stage or time() - cached.get('ran_at', 0) < stage['max_age']
+                if (name not in force and fresh and cached.get('fingerprint') == key
+                        and cached.get('outputs') == outputs_fingerprint(stage, workdir)):
+                    pending.discard(name)
+                    report[name] = {'status': 'cached', 'seconds': 0.0}
+                    print(f"[{name}] unchanged, skipped")
+                    continue
+
+                pending.discard(name)
+                print(f"[{name}] running {stage['script']}")
+                running[pool.submit(run_stage, name, stage, workdir, metrics)] = name
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                returncode, seconds = future.result()
+                stage = stages[name]
+                if returncode == 0:
+                    cache[name] = {'fingerprint': fingerprint(stage, workdir),
+                                   'outputs': outputs_fingerprint(stage, workdir),
+                                   'ran_at': time()}
+                    save_cache()
+                    report[name] = {'status': 'ran', 'seconds': seconds}
+                    print(f"[{name}] done in {seconds:.2f}s")
+                else:
+                    report[name] = {'status': 'failed', 'seconds': seconds}
+                    print(f"[{name}] failed (exit {returncode}) after {seconds:.2f}s, see {name}.log")
+
+    return report
+
+# Main execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the data pipeline, skipping stages whose inputs are unchanged.")
+    parser.add_argument('--workdir', default='.', help="directory holding the pipeline databases")
+    parser.add_argument('--force', nargs='*', default=[], choices=list(STAGES), help="stages to re-run regardless")
+    parser.add_argument('--only', nargs='+', choices=list(STAGES), help="run just these stages")
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--metrics', action='store_true', help="write each stage's metrics to <stage>.prom")
+    args = parser.parse_args()
+
+    stages = {name: STAGES[name] for name in args.only} if args.only else STAGES
+    report = run_pipeline(stages, args.workdir, set(args.force), args.workers, args.metrics)
+
+    print("\nStage timings:")
+    for name in stages:
+        print(f"{name:>10}: {report[name]['status']:>7} {report[name]['seconds']:8.2f}s")
+    with open(os.path.join(args.workdir, 'pipeline_report.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+
+    if any(r['status'] in ('failed', 'blocked') for r in report.values()):
+        sys.exit(1)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The scripts import their neighbours by bare name, as they do when run from their own directory
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+for directory in ['Data Acquisition', 'Data Processing', 'Deployment', 'Machine Learning']:
+    sys.path.insert(0, os.path.join(ROOT, directory))
@@ -0,0 +1,23 @@
+import numpy as np
+from features import FIELD_CODES, FEATURE_COLUMNS, FeatureTransformer, default_spec
+
+RECORD = {'cgpa': 8.0, 'project_score': 70.0, 'internships': 2, 'extracurricular_score': 60.0}
+
+def field_column(X):
+    return X[:, FEATURE_COLUMNS.index('field')].astype(int).tolist()
+
+def test_field_is_derived_only_for_records_that_omit_it():
+    transformer = FeatureTransformer(default_spec())
+    X = transformer.transform([
+        {**RECORD, 'department': 'Civil', 'field': 'IT'},
+        {**RECORD, 'department': 'Computer Science'},
+        {**RECORD, 'department': 'Civil', 'field': None},
+        {**RECORD, 'department': 'Electronics', 'field': FIELD_CODES['Non-IT']},
+    ])
+    assert field_column(X) == [FIELD_CODES['IT'], FIELD_CODES['IT'], FIELD_CODES['Non-IT'], FIELD_CODES['Non-IT']]
+
+def test_columns_and_records_give_the_same_matrix():
+    transformer = FeatureTransformer(default_spec())
+    records = [{**RECORD, 'department': d} for d in ['Civil', 'Electronics']]
+    columns = {c: [r[c] for r in records] for c in records[0]}
+    assert np.array_equal(transformer.transform(records), transformer.transform(columns))
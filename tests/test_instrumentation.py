@@ -0,0 +1,84 @@
+import asyncio
+from time import sleep
+import pytest
+import instrumentation
+from instrumentation import REGISTRY, instrument, span, timed
+
+@pytest.fixture
+def metrics():
+    was_enabled = instrumentation.ENABLED
+    instrumentation.enable(True)
+    REGISTRY.reset()
+    yield REGISTRY
+    REGISTRY.reset()
+    instrumentation.enable(was_enabled)
+
+def seconds(registry, stage):
+    return registry.snapshot()['stages'][stage]['sum_seconds']
+
+def test_disabled_records_nothing():
+    was_enabled = instrumentation.ENABLED
+    instrumentation.enable(False)
+    REGISTRY.reset()
+    try:
+        with span('off') as s:
+            s.add_rows(3)
+        items = [1, 2]
+        assert timed('off', items) is items
+        assert instrument('off', rows=len)(lambda: [1])() == [1]
+        assert REGISTRY.snapshot() == {'stages': {}, 'counters': {}}
+    finally:
+        instrumentation.enable(was_enabled)
+
+def test_span_records_rows_and_errors(metrics):
+    with span('parse') as s:
+        s.add_rows(5)
+    with pytest.raises(ValueError):
+        with span('parse'):
+            raise ValueError
+    snapshot = metrics.snapshot()
+    assert snapshot['stages']['parse']['count'] == 2
+    assert snapshot['counters'] == {'rows': {'parse': 5}, 'errors': {'parse': 1}}
+
+def test_streamed_stages_report_their_own_time(metrics):
+    def produce():
+        for i in range(3):
+            sleep(0.01)
+            yield i
+
+    def transform(items):
+        for item in items:
+            sleep(0.02)
+            yield item * 2
+
+    with span('save') as s:
+        for item in timed('map', transform(timed('fetch', produce()))):
+            sleep(0.03)
+            s.add_rows(1)
+
+    assert 0.03 <= seconds(metrics, 'fetch') < 0.06
+    assert 0.06 <= seconds(metrics, 'map') < 0.09
+    assert 0.09 <= seconds(metrics, 'save') < 0.12
+    assert metrics.snapshot()['counters']['rows'] == {'fetch': 3, 'map': 3, 'save': 3}
+
+def test_concurrent_tasks_keep_separate_spans(metrics):
+    async def request(delay):
+        with span('predict'):
+            await asyncio.sleep(delay)
+
+    async def main():
+        with span('outer'):
+            await asyncio.gather(request(0.02), request(0.04))
+
+    asyncio.run(main())
+    assert metrics.snapshot()['stages']['predict']['count'] == 2
+    assert 0.06 <= seconds(metrics, 'predict') < 0.1
+    assert seconds(metrics, 'outer') >= 0.0
+
+def test_prometheus_text(metrics):
+    with span('fetch_students') as s:
+        s.add_rows(10)
+    text = metrics.render_prometheus()
+    assert '# TYPE stage_duration_seconds histogram' in text
+    assert 'stage_duration_seconds_bucket{stage="fetch_students",le="+Inf"} 1' in text
+    assert 'stage_rows_total{stage="fetch_students"} 10' in text
@@ -0,0 +1,49 @@
+import os
+import sqlite3
+import pytest
+from linking import build_links
+
+def nirf_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE institutions (id INTEGER PRIMARY KEY AUTOINCREMENT, rank TEXT, institution_name TEXT, "
+                 "city TEXT, state TEXT, score TEXT, year INTEGER, category TEXT)")
+    conn.executemany("INSERT INTO institutions (rank, institution_name, city, state, score, year, category) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?)", [
+                         ('1', "Indian Institute of Technology Madras More Details", 'Chennai', 'Tamil Nadu', '89.5',
+                          2024, 'Engineering'),
+                         ('1', "Indian Institute of Technology Madras", 'Madras', 'Tamil Nadu', '90.0', 2023,
+                          'Engineering'),
+                         ('7', "R V College of Engineering", 'Bangalore', 'Karnataka', '60.1', 2024, 'Engineering'),
+                     ])
+    conn.commit()
+    conn.close()
+    return path
+
+def test_missing_sources_give_empty_links(tmp_path):
+    out = str(tmp_path / 'linked.db')
+    counts = build_links(str(tmp_path / 'jobs.db'), nirf_db(str(tmp_path / 'nirf_rankings.db')),
+                         str(tmp_path / 'mapped_data.db'), out)
+
+    assert counts['institution_entities'] == 2
+    assert counts['jobs_linked'] == counts['institution_outcomes'] == counts['city_links'] == 0
+    assert not os.path.exists(out + '.tmp')
+    conn = sqlite3.connect(out)
+    assert conn.execute("SELECT name, city, best_rank FROM institution_entities ORDER BY best_rank").fetchall() == \
+        [("Indian Institute of Technology Madras", 'chennai', 1), ("R V College of Engineering", 'bengaluru', 7)]
+    conn.close()
+
+def test_no_sources_at_all(tmp_path):
+    counts = build_links(str(tmp_path / 'a.db'), str(tmp_path / 'b.db'), str(tmp_path / 'c.db'),
+                         str(tmp_path / 'linked.db'))
+    assert all(count == 0 for table, count in counts.items() if table != 'seconds')
+    assert os.listdir(tmp_path) == ['linked.db']
+
+def test_failed_build_keeps_previous_output(tmp_path):
+    out = tmp_path / 'linked.db'
+    out.write_bytes(b'previous')
+    broken = tmp_path / 'jobs.db'
+    broken.write_bytes(b'not a database' * 100)
+    with pytest.raises(sqlite3.DatabaseError):
+        build_links(str(broken), str(tmp_path / 'b.db'), str(tmp_path / 'c.db'), str(out))
+    assert out.read_bytes() == b'previous'
+    assert not os.path.exists(str(out) + '.tmp')
@@ -0,0 +1,77 @@
+from collections import Counter
+import numpy as np
+import pytest
+from Mapping import allocate_students, fetch_preferences, iter_students, map_students_stable, map_students_to_institutions
+from student import StudentDatabase
+
+DEPARTMENTS = ["Computer Science", "Mechanical", "Electrical", "Civil", "Electronics"]
+
+def make_students(n, seed=0):
+    """Student tuples as iter_students yields them, best total score first."""
+    rng = np.random.default_rng(seed)
+    students = [(i, f"Student {i}", 8.0, 70.0, 1, 60.0, DEPARTMENTS[rng.integers(5)],
+                 "IT", "Selected", float(rng.uniform(150, 250))) for i in range(n)]
+    return sorted(students, key=lambda s: -s[9])
+
+def make_institutions(n):
+    return [(i, f"Institute {i}", i + 1) for i in range(n)]
+
+def baseline_mapping(students, institutions):
+    """The original equal split: consecutive blocks by score, then the remainder round-robin."""
+    per_institution = len(students) // len(institutions)
+    blocks = [institutions[min(i // per_institution, len(institutions) - 1)]
+              for i in range(per_institution * len(institutions))]
+    rest = [institutions[i % len(institutions)] for i in range(len(students) - len(blocks))]
+    return [institution[1] for institution in blocks + rest]
+
+def test_equal_split_matches_the_baseline():
+    students, institutions = make_students(1003), make_institutions(7)
+    mapped = map_students_to_institutions(students, institutions)
+    assert [row[9] for row in mapped] == baseline_mapping(students, institutions)
+
+def test_explicit_capacities_are_never_exceeded():
+    students, institutions = make_students(1003), make_institutions(7)
+    capacities = [100, 50, 0, 200, 10, 10, 10]
+    mapped = list(allocate_students(students, institutions, capacities))
+
+    seats = Counter(row[9] for row in mapped)
+    assert [seats[institution[1]] for institution in institutions] == capacities
+    assert seats[None] == 1003 - sum(capacities)
+    # The best students get the seats
+    assert all(row[9] is not None for row in mapped[:sum(capacities)])
+
+def test_department_quotas_are_never_exceeded():
+    students, institutions = make_students(1003), make_institutions(7)
+    quotas = {department: 30 for department in DEPARTMENTS}
+    mapped = list(allocate_students(students, institutions, [150] * 7, quotas))
+
+    per_institution = Counter(row[9] for row in mapped if row[9] is not None)
+    per_department = Counter((row[9], row[6]) for row in mapped if row[9] is not None)
+    assert max(per_institution.values()) <= 150
+    assert max(per_department.values()) <= 30
+    assert len(mapped) == 1003
+
+def test_no_institutions_is_an_error():
+    with pytest.raises(ValueError, match="no institutions"):
+        list(allocate_students(make_students(5), [], total=5))
+
+def test_stable_strategy_uses_generated_preferences_across_rescrapes(tmp_path):
+    db_name = str(tmp_path / 'students_college.db')
+    db = StudentDatabase(db_name)
+    db.generate_students_bulk(500, ["Ananya BL", "Harsha", "Kavya"], seed=3)
+    db.generate_preferences([institution[1] for institution in make_institutions(7)], choices=3, seed=3)
+    chosen = {}
+    for student_id, name in db.cursor.execute("SELECT student_id, institution_name FROM student_preferences"):
+        chosen.setdefault(student_id, set()).add(name)
+    db.close_connection()
+    assert len(chosen) == 500 and all(len(names) == 3 for names in chosen.values())
+
+    # A re-scrape renumbers the institutions but keeps their names
+    institutions = [(100 + i, name, rank) for i, name, rank in make_institutions(7)]
+    students = list(iter_students(db_name))
+    preferences = fetch_preferences(students, institutions, db_name)
+    assert preferences is not None
+
+    mapped = map_students_stable(students, institutions, preferences)
+    assert all(row[9] is None or row[9] in chosen[student[0]] for student, row in zip(students, mapped))
+    assert sum(row[9] is not None for row in mapped) > 0
@@ -0,0 +1,50 @@
+import os
+import pipeline
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def relative_sources(stage):
+    return {os.path.relpath(path, ROOT) for path in pipeline.stage_sources(pipeline.STAGES[stage]['script'])}
+
+def test_stage_sources_follow_imports_across_directories():
+    assert os.path.join('Data Processing', 'scoring.py') in relative_sources('students')
+    assert os.path.join('Data Processing', 'instrumentation.py') in relative_sources('nirf')
+    assert {os.path.join('Data Processing', 'dataset.py'), os.path.join('Data Processing', 'features.py'),
+            os.path.join('Deployment', 'tree_export.py')} <= relative_sources('train')
+    # Modules in the same directory that the stage doesn't import are not part of its key
+    assert os.path.join('Data Processing', 'linking.py') not in relative_sources('mapping')
+
+def counting_stage(tmp_path, max_age=None):
+    script = tmp_path / 'stage.py'
+    script.write_text("with open('runs.txt', 'a') as f:\n    f.write('run\\n')\n")
+    stage = {'script': str(script), 'args': [], 'inputs': [], 'outputs': ['runs.txt']}
+    if max_age is not None:
+        stage['max_age'] = max_age
+    return {'scrape': stage}
+
+def runs(workdir):
+    with open(os.path.join(workdir, 'runs.txt')) as f:
+        return len(f.readlines())
+
+def test_stage_without_inputs_is_cached(tmp_path):
+    stages, workdir = counting_stage(tmp_path), str(tmp_path / 'work')
+    assert pipeline.run_pipeline(stages, workdir)['scrape']['status'] == 'ran'
+    assert pipeline.run_pipeline(stages, workdir)['scrape']['status'] == 'cached'
+    assert runs(workdir) == 1
+
+def test_stage_reruns_once_older_than_max_age(tmp_path):
+    workdir = str(tmp_path / 'work')
+    pipeline.run_pipeline(counting_stage(tmp_path, max_age=3600), workdir)
+    assert pipeline.run_pipeline(counting_stage(tmp_path, max_age=3600), workdir)['scrape']['status'] == 'cached'
+    assert pipeline.run_pipeline(counting_stage(tmp_path, max_age=0), workdir)['scrape']['status'] == 'ran'
+    assert runs(workdir) == 2
+
+def test_editing_an_imported_module_invalidates_the_stage(tmp_path):
+    helper = tmp_path / 'helper.py'
+    helper.write_text("VALUE = 1\n")
+    script = tmp_path / 'stage.py'
+    script.write_text("import helper\nopen('out.txt', 'w').write(str(helper.VALUE))\n")
+    stage = {'script': str(script), 'args': [], 'inputs': [], 'outputs': ['out.txt']}
+    before = pipeline.fingerprint(stage, str(tmp_path))
+    helper.write_text("VALUE = 2\n")
+    assert pipeline.fingerprint(stage, str(tmp_path)) != before
@@ -0,0 +1,82 @@
+import os
+import shutil
+import sqlite3
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+
+pytest.importorskip('selenium')
+pytest.importorskip('fake_useragent')
+from selenium.common.exceptions import WebDriverException
+from analytics import JOBS_INDEXES
+from Scrape_jobs import create_db, enqueue_tasks, make_driver, run
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'jobs')
+
+class ResultsStub(SimpleHTTPRequestHandler):
+    """Serves fixtures/jobs/page_<start>.html for /jobs?q=..&l=..&start=<start>."""
+
+    def translate_path(self, path):
+        start = parse_qs(urlparse(path).query).get('start', ['0'])[0]
+        return os.path.join(FIXTURES, f'page_{start}.html')
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def url_template():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(ResultsStub, directory=FIXTURES))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # Literal braces for the query/location/start placeholders run() fills in
+    yield f"http://127.0.0.1:{server.server_address[1]}/jobs?q={{}}&l={{}}&start={{}}"
+    server.shutdown()
+    server.server_close()
+
+def task_status(conn):
+    return conn.execute("SELECT page, status FROM scrape_tasks ORDER BY page").fetchall()
+
+@pytest.mark.skipif(not (os.environ.get('CHROMEDRIVER') or shutil.which('chromedriver')),
+                    reason="needs a local chromedriver and Chrome")
+def test_scrapes_fixture_pages(tmp_path, url_template):
+    conn, _ = create_db(str(tmp_path / 'jobs.db'))
+    tasks = enqueue_tasks(conn, 'Engineer+Fresher', 'Bengaluru', 2)
+    run(conn, tasks, url_template, workers=1, min_delay=0, max_delay=0, driver_factory=lambda: make_driver(True))
+
+    jobs = conn.execute("SELECT job_id, title, salary FROM jobs ORDER BY job_id").fetchall()
+    assert jobs == [('job_a1f3', "Graduate Engineer Trainee", "₹3,50,000 - ₹4,50,000 a year"),
+                    ('job_b27c', "Junior Software Engineer", "Estimated ₹4L a year"),
+                    ('job_c9d0', "Fresher Civil Site Engineer", "₹3,00,000 a year"),
+                    ('job_d4e5', "Electrical Design Engineer", None)]
+    assert task_status(conn) == [(0, 'done'), (1, 'done')]
+    conn.close()
+
+def test_tasks_stay_queued_when_the_browser_cannot_start(tmp_path, url_template):
+    def no_browser():
+        raise WebDriverException("chrome not reachable")
+
+    conn, _ = create_db(str(tmp_path / 'jobs.db'))
+    tasks = enqueue_tasks(conn, 'Engineer+Fresher', 'Bengaluru', 2)
+    run(conn, tasks, url_template, workers=2, min_delay=0, max_delay=0, driver_factory=no_browser)
+
+    assert task_status(conn) == [(0, 'pending'), (1, 'pending')]
+    assert enqueue_tasks(conn, 'Engineer+Fresher', 'Bengaluru', 2) == tasks
+    conn.close()
+
+def test_dedup_keeps_rows_without_job_id(tmp_path):
+    db = str(tmp_path / 'jobs.db')
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, company_location TEXT, "
+                 "url TEXT, job_id TEXT, salary TEXT)")
+    conn.executemany("INSERT INTO jobs (title, job_id) VALUES (?, ?)",
+                     [("A", 'job_1'), ("A again", 'job_1'), ("No id 1", None), ("No id 2", None), ("B", 'job_2')])
+    conn.commit()
+    conn.close()
+
+    conn, _ = create_db(db)
+    assert conn.execute("SELECT title FROM jobs ORDER BY id").fetchall() == \
+        [("A",), ("No id 1",), ("No id 2",), ("B",)]
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list(jobs)")}
+    assert {'idx_jobs_job_id', *JOBS_INDEXES} <= indexes
+    conn.close()
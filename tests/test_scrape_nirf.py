@@ -0,0 +1,106 @@
+import asyncio
+import os
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+pytest.importorskip('aiohttp')
+pytest.importorskip('requests')
+from Scrape_NIRF import clear_table, create_db, scrape_all
+from nirf_parser import PARSERS, available_parsers
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'EngineeringRanking.html')
+ETAG = '"nirf-2024-engineering-v1"'
+
+class RankingStub(BaseHTTPRequestHandler):
+    """Serves the Engineering 2024 fixture with an ETag and answers 304 to a matching If-None-Match."""
+
+    requests = []
+
+    def do_GET(self):
+        RankingStub.requests.append((self.path, self.headers.get('If-None-Match')))
+        if self.path != '/Rankings/2024/EngineeringRanking.html':
+            self.send_response(404)
+            self.end_headers()
+            return
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        with open(FIXTURE, 'rb') as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header('ETag', ETAG)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub_url():
+    RankingStub.requests = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RankingStub)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def stored_rows(db):
+    conn = sqlite3.connect(db)
+    rows = conn.execute("SELECT rank, institution_name, city, year, category FROM institutions ORDER BY id").fetchall()
+    conn.close()
+    return rows
+
+def test_conditional_get_skips_unchanged_pages(tmp_path, stub_url):
+    db = str(tmp_path / 'nirf_rankings.db')
+
+    conn, _ = create_db(db)
+    asyncio.run(scrape_all(conn, [2024], ['Engineering', 'Law'], stub_url, retries=0))
+    conn.close()
+    first = stored_rows(db)
+    assert first == [('1', "Indian Institute of Technology Madras", 'Chennai', 2024, 'Engineering'),
+                     ('2', "Indian Institute of Technology Delhi", 'New Delhi', 2024, 'Engineering'),
+                     ('3', "Indian Institute of Technology Bombay", 'Mumbai', 2024, 'Engineering')]
+    assert ('/Rankings/2024/EngineeringRanking.html', None) in RankingStub.requests
+
+    # The second run revalidates with the stored ETag, gets 304 and leaves the rows alone
+    RankingStub.requests = []
+    conn, _ = create_db(db)
+    asyncio.run(scrape_all(conn, [2024], ['Engineering'], stub_url, retries=0))
+    conn.close()
+    assert RankingStub.requests == [('/Rankings/2024/EngineeringRanking.html', ETAG)]
+    assert stored_rows(db) == first
+
+def test_available_parsers_agree_on_fixture():
+    with open(FIXTURE, encoding='utf-8') as f:
+        html = f.read()
+    reference = PARSERS['bs4'][0](html)
+    assert reference
+    for name in available_parsers():
+        assert PARSERS[name][0](html) == reference, name
+
+def test_create_db_backfills_rows_from_before_year_and_category(tmp_path):
+    db = str(tmp_path / 'nirf_rankings.db')
+    conn = sqlite3.connect(db)
+    conn.execute('CREATE TABLE institutions (id INTEGER PRIMARY KEY AUTOINCREMENT, rank TEXT, '
+                 'institution_name TEXT, city TEXT, state TEXT, score TEXT)')
+    conn.execute("INSERT INTO institutions (rank, institution_name, city, state, score) "
+                 "VALUES ('1', 'IIT Madras', 'Chennai', 'Tamil Nadu', '89.46')")
+    conn.commit()
+    conn.close()
+
+    create_db(db)[0].close()
+    assert stored_rows(db) == [('1', 'IIT Madras', 'Chennai', 2024, 'Engineering')]
+
+def test_clear_table_rejects_partial_year_category(tmp_path):
+    conn, cursor = create_db(str(tmp_path / 'nirf_rankings.db'))
+    with pytest.raises(ValueError):
+        clear_table(cursor, year=2024)
+    with pytest.raises(ValueError):
+        clear_table(cursor, category='Engineering')
+    conn.close()
@@ -0,0 +1,42 @@
+import sqlite3
+from student import BLOCK_SIZE, StudentDatabase, generate_sharded, merge_shards
+
+NAMES = ["Ananya BL", "Harsha", "Kavya", "Rohan K", "Shiva"]
+N = 2 * BLOCK_SIZE + 517
+COLUMNS = ("name, enrollment_number, department, cgpa, project_score, internships, "
+           "research_papers, extracurricular_score, outcome, field")
+
+def students(db_name):
+    conn = sqlite3.connect(db_name)
+    rows = conn.execute(f"SELECT {COLUMNS} FROM students ORDER BY id").fetchall()
+    conn.close()
+    return rows
+
+def bulk(path, chunk_size, seed=7):
+    db = StudentDatabase(str(path))
+    db.generate_students_bulk(N, NAMES, seed=seed, chunk_size=chunk_size)
+    db.close_connection()
+    return students(str(path))
+
+def test_bulk_output_does_not_depend_on_chunk_size(tmp_path):
+    expected = bulk(tmp_path / 'a.db', chunk_size=100_000)
+    assert len(expected) == N
+    assert bulk(tmp_path / 'b.db', chunk_size=3_001) == expected
+    assert bulk(tmp_path / 'c.db', chunk_size=100_000, seed=8) != expected
+
+def test_sharded_output_matches_single_process(tmp_path):
+    expected = bulk(tmp_path / 'single.db', chunk_size=100_000)
+    for workers, chunk_size in [(3, 4_096), (4, 100_000)]:
+        out_dir = tmp_path / f'shards{workers}'
+        paths = generate_sharded(N, NAMES, workers, seed=7, out_dir=str(out_dir), chunk_size=chunk_size)
+        merge_shards(paths, str(out_dir / 'merged.db')).close_connection()
+        assert students(str(out_dir / 'merged.db')) == expected
+
+def test_outcome_index_is_built_by_the_load_not_by_count_outcomes(tmp_path):
+    db = StudentDatabase(str(tmp_path / 'students.db'))
+    db.generate_students_bulk(1_000, NAMES, seed=7)
+    assert 'idx_students_outcome' in {row[1] for row in db.cursor.execute("PRAGMA index_list(students)")}
+    db.cursor.execute("DROP INDEX idx_students_outcome;")
+    db.count_outcomes()
+    assert 'idx_students_outcome' not in {row[1] for row in db.cursor.execute("PRAGMA index_list(students)")}
+    db.close_connection()
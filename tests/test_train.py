@@ -0,0 +1,25 @@
+import joblib
+import numpy as np
+import pytest
+from sklearn.base import clone
+from sklearn.svm import LinearSVC
+from train import LARGE_N, MODELS, default_models, publish
+
+def test_every_candidate_supports_predict_proba():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(150, 7))
+    y = (X[:, 0] > 0).astype(int) + (X[:, 1] > 1)
+    for name, (estimator, grid) in MODELS.items():
+        model = clone(estimator).fit(X, y)
+        assert model.predict_proba(X[:3]).shape == (3, 3), name
+
+def test_large_datasets_search_only_hgb():
+    assert default_models(LARGE_N) == list(MODELS)
+    assert default_models(LARGE_N + 1) == ['hgb']
+
+def test_publish_rejects_models_without_predict_proba(tmp_path):
+    model = LinearSVC().fit([[0.0], [1.0]], [0, 1])
+    joblib.dump({'model': model, 'features': None}, tmp_path / 'artifact')
+    with pytest.raises(ValueError):
+        publish(str(tmp_path / 'artifact'), str(tmp_path / 'model_placement_prediction'))
+    assert not (tmp_path / 'model_placement_prediction').exists()
@@ -0,0 +1,48 @@
+import os
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier
+from tree_eval import CURRENT_FILE, CompiledModel
+from tree_export import export_model, export_versions
+
+def training_data(n_classes, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(600, 7))
+    y = np.digitize(X[:, 0] + 0.5 * X[:, 3] - 0.25 * X[:, 5], np.linspace(-1, 1, n_classes - 1))
+    return X, y
+
+@pytest.mark.parametrize('n_classes', [2, 3])
+def test_compiled_trees_match_predict_proba(tmp_path, n_classes):
+    X, y = training_data(n_classes)
+    model = GradientBoostingClassifier(n_estimators=30, max_depth=3, random_state=0).fit(X, y)
+    export_model(model, str(tmp_path / 'model.trees'))
+
+    compiled = CompiledModel.load(str(tmp_path / 'model.trees'), mmap_mode='r')
+    np.testing.assert_allclose(compiled.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-9)
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+
+def test_reexport_leaves_loaded_model_untouched(tmp_path):
+    X, y = training_data(3)
+    path = str(tmp_path / 'model.trees')
+    first = GradientBoostingClassifier(n_estimators=20, max_depth=2, random_state=0).fit(X, y)
+    export_model(first, path)
+    live = CompiledModel.load(path, mmap_mode='r')
+    before = live.predict_proba(X)
+
+    # A bigger model replaces it while the first one is still memory-mapped
+    second = GradientBoostingClassifier(n_estimators=40, max_depth=4, random_state=1).fit(X, -y + 2)
+    export_model(second, path)
+
+    np.testing.assert_array_equal(live.predict_proba(X), before)
+    np.testing.assert_allclose(CompiledModel.load(path).predict_proba(X), second.predict_proba(X), atol=1e-9)
+
+def test_old_versions_are_pruned(tmp_path):
+    X, y = training_data(2)
+    model = GradientBoostingClassifier(n_estimators=5, random_state=0).fit(X, y)
+    path = str(tmp_path / 'model.trees')
+    for _ in range(4):
+        export_model(model, path)
+
+    assert export_versions(path) == [3, 4]
+    with open(os.path.join(path, CURRENT_FILE)) as f:
+        assert f.read() == 'v4'